@@ -0,0 +1,97 @@
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from media_types import media_type, get_engine
+
+# Default number of jobs per media type allowed to run at once
+DEFAULT_LIMITS = {'image': 4, 'audio': 4, 'video': 1}
+
+
+def _run_engine(path: str, operation: str, args: tuple, kwargs: dict):
+    # Executed inside a worker process
+    return getattr(get_engine(path), operation)(path, *args, **kwargs)
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def _write_decoded(path: str, decoded) -> None:
+    # Streamed payloads decode to bytes, messages to str
+    with open(path, 'wb' if isinstance(decoded, bytes) else 'w') as f:
+        f.write(decoded)
+
+
+class AsyncSteganography:
+    """Asyncio facade over the image, audio and video engines.
+
+    CPU-bound encode/decode runs in a managed process pool, file I/O in a thread
+    pool. Each media type has its own concurrency limit, and at most max_pending
+    jobs are admitted at once so callers are slowed down instead of queueing
+    unbounded work.
+    """
+
+    def __init__(self, max_workers: int = None, io_workers: int = None, limits: dict = None,
+                 max_pending: int = 64):
+        self._process_pool = ProcessPoolExecutor(max_workers=max_workers)
+        self._thread_pool = ThreadPoolExecutor(max_workers=io_workers)
+        self._limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self._max_pending = max_pending
+        self._semaphores = None
+        self._pending = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _media_semaphore(self, kind: str) -> asyncio.Semaphore:
+        if self._semaphores is None:
+            # Created lazily so they bind to the running event loop
+            self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self._limits.items()}
+            self._pending = asyncio.Semaphore(self._max_pending)
+        return self._semaphores[kind]
+
+    async def _io(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread_pool, func, *args)
+
+    async def _submit(self, path: str, operation: str, *args, **kwargs):
+        semaphore = self._media_semaphore(media_type(path))
+        async with self._pending:
+            if not await self._io(os.path.exists, path):
+                raise FileNotFoundError(f"Error: Input file does not exist: {path}")
+            async with semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._process_pool, _run_engine, path, operation, args, kwargs)
+
+    async def encode(self, media_path: str, message: str, output_path: str, key: str = None, **options) -> None:
+        """Encodes a message into any supported media file without blocking the event loop."""
+        await self._submit(media_path, 'encode', message, output_path, key, **options)
+
+    async def encode_file(self, media_path: str, message_path: str, output_path: str, key: str = None,
+                          **options) -> None:
+        """Encodes the contents of a text file; the file is read on the I/O thread pool."""
+        message = await self._io(_read_text, message_path)
+        await self.encode(media_path, message, output_path, key, **options)
+
+    async def decode(self, media_path: str, key: str = None, output_path: str = None, **options):
+        """Decodes a message, optionally also writing it to output_path on the I/O thread pool.
+
+        Returns str, or bytes for a binary payload.
+        """
+        message = await self._submit(media_path, 'decode', key, **options)
+        if output_path:
+            await self._io(_write_decoded, output_path, message)
+        return message
+
+    async def capacity(self, media_path: str) -> int:
+        return await self._submit(media_path, 'capacity')
+
+    async def close(self) -> None:
+        """Shuts down the worker pools once running jobs have finished."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._process_pool.shutdown, True)
+        await loop.run_in_executor(None, self._thread_pool.shutdown, True)
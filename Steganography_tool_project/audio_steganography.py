@@ -1,3 +1,4 @@
+import io
 import os
 import wave
 import struct
@@ -5,7 +6,13 @@ import tempfile
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import base64
+import numpy as np
 from pydub import AudioSegment
+from scattering import text_to_bits
+from matrix_embedding import embed_bits, extract_terminated, elements_for_bits
+from prepared_payload import PreparedPayload, prepared_bits
+from payload_stream import (DEFAULT_CHUNK_SIZE, BitFeeder, PayloadReader, is_stream_source, iter_container_bits,
+                            has_container_magic, write_text, container_source)
 
 
 class AudioSteganography:
@@ -22,14 +29,99 @@ class AudioSteganography:
         return decrypted_msg.decode()
 
     @staticmethod
-    def encode(audio_path: str, message: str, output_path: str, key: str = None) -> None:
+    def capacity(audio_path: str) -> int:
+        """Returns how many message bytes (after encryption) fit into the audio."""
+        if audio_path.lower().endswith('.mp3'):
+            audio = AudioSegment.from_mp3(audio_path)
+            frame_bytes = int(audio.frame_count()) * audio.sample_width * audio.channels
+        else:
+            with wave.open(audio_path, 'rb') as audio:
+                frame_bytes = audio.getnframes() * audio.getsampwidth() * audio.getnchannels()
+        return max(frame_bytes // 8 - 1, 0)  # Minus the null terminator
+
+    @staticmethod
+    def _chunk_frames(audio, chunk_size: int) -> int:
+        # Frames per carrier chunk: enough bytes for chunk_size payload bytes, a multiple of 8
+        frame_bytes = audio.getsampwidth() * audio.getnchannels()
+        return max(chunk_size * 8 // frame_bytes // 8 * 8, 8)
+
+    @staticmethod
+    def _encode_stream(audio_path: str, source, output_path: str, key: str, chunk_size: int,
+                       ecc: int = None, text: bool = False) -> None:
+        """Embeds a binary container while copying the audio one chunk of frames at a time."""
+        feeder = BitFeeder(iter_container_bits(source, key, chunk_size, ecc, text))
+        # Written beside the output and moved into place at the end, so the input may be the output
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.wav', dir=os.path.dirname(output_path) or '.')
+        os.close(temp_fd)
+        try:
+            with wave.open(audio_path, 'rb') as audio, wave.open(temp_path, 'wb') as encoded_audio:
+                encoded_audio.setparams(audio.getparams())
+                chunk_frames = AudioSteganography._chunk_frames(audio, chunk_size)
+                while True:
+                    frames = audio.readframes(chunk_frames)
+                    if not frames:
+                        break
+                    bits = feeder.take(len(frames))
+                    if len(bits):
+                        samples = np.frombuffer(frames, dtype=np.uint8).copy()
+                        samples[:len(bits)] = (samples[:len(bits)] & 0xFE) | bits
+                        frames = samples.tobytes()
+                    encoded_audio.writeframes(frames)
+            if not feeder.exhausted:
+                raise ValueError("Message too large for the audio.")
+            os.replace(temp_path, output_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _decode_stream(audio_path: str, sink, key: str, chunk_size: int):
+        """Reads a binary container into sink one chunk of frames at a time.
+
+        Returns the finished PayloadReader, or None if the audio holds no container.
+        """
+        reader = PayloadReader(sink, key)
+        with wave.open(audio_path, 'rb') as audio:
+            chunk_frames = AudioSteganography._chunk_frames(audio, chunk_size)
+            first = True
+            while True:
+                frames = audio.readframes(chunk_frames)
+                if not frames:
+                    raise ValueError("Audio ended before the end of the payload")
+                samples = np.frombuffer(frames, dtype=np.uint8)
+                values = np.packbits(samples[:len(samples) - len(samples) % 8] & 1).tobytes()
+                if first and not has_container_magic(values):
+                    return None
+                first = False
+                if reader.feed(values):
+                    return reader
+
+    @staticmethod
+    def encode(audio_path: str, message, output_path: str, key: str = None, scatter_key: str = None,
+               matrix_k: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, ecc: int = None) -> None:
+        """Hides message in the audio samples' LSBs.
+
+        message may also be bytes, a binary file-like object or an iterable of
+        bytes; it is then framed as a binary container and embedded while the
+        audio is copied chunk by chunk, so memory does not grow with its size.
+        A PreparedPayload is embedded as already encrypted and framed. With ecc
+        (Reed-Solomon parity bytes per 255-byte block) a str message is framed as
+        a container too, so damaged bits are repaired on decoding.
+        """
+        prepared = isinstance(message, PreparedPayload)
+        if prepared and ecc:
+            raise ValueError("A PreparedPayload has fixed framing; ecc cannot be added to it")
+        stream = bool(ecc) or (not prepared and is_stream_source(message))
+        if stream and (scatter_key or matrix_k):
+            raise ValueError("Streamed payloads only support the sequential layout")
+
+        if prepared:
+            bits = prepared_bits(message, 'audio', key)
         # Optional encryption
-        if key:
+        elif key and not stream:
             message = AudioSteganography.encrypt_message(key, message)
 
-        # Append null-terminator and convert to binary
-        binary_msg = ''.join(format(ord(c), '08b') for c in message) + '00000000'
-
         # Handle MP3 input
         is_mp3 = audio_path.lower().endswith('.mp3')
         temp_wav = None
@@ -42,22 +134,30 @@ class AudioSteganography:
             audio_path = temp_wav
 
         try:
+            if stream:
+                source, text = container_source(message)
+                AudioSteganography._encode_stream(audio_path, source, output_path, key, chunk_size, ecc, text)
+                return
+
+            # Append null-terminator and convert to binary
+            if not prepared:
+                bits = np.append(text_to_bits(message), np.zeros(8, dtype=np.uint8))
+
             # Open WAV file
             with wave.open(audio_path, 'rb') as audio:
                 params = audio.getparams()
-                frames = bytearray(audio.readframes(audio.getnframes()))
+                frames = np.frombuffer(audio.readframes(audio.getnframes()), dtype=np.uint8).copy()
 
-            if len(binary_msg) > len(frames):
+            if elements_for_bits(len(bits), matrix_k) > len(frames):
                 raise ValueError("Message too large for the audio.")
 
-            # Embed message
-            for i in range(len(binary_msg)):
-                frames[i] = (frames[i] & ~1) | int(binary_msg[i])
+            # Embed message, in order or at keyed pseudo-random bytes
+            embed_bits(frames, bits, len(frames), scatter_key=scatter_key, matrix_k=matrix_k)
 
             # Save encoded file
             with wave.open(output_path, 'wb') as encoded_audio:
                 encoded_audio.setparams(params)
-                encoded_audio.writeframes(frames)
+                encoded_audio.writeframes(frames.tobytes())
 
         finally:
             # Clean up temporary WAV file
@@ -65,7 +165,13 @@ class AudioSteganography:
                 os.remove(temp_wav)
 
     @staticmethod
-    def decode(audio_path: str, key: str = None) -> str:
+    def decode(audio_path: str, key: str = None, scatter_key: str = None, matrix_k: int = None, sink=None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Returns the hidden message as str, or as bytes for streamed payloads.
+
+        With a sink (a binary file-like object) the payload is written there
+        instead and the number of bytes written is returned.
+        """
         # Handle MP3 input
         is_mp3 = audio_path.lower().endswith('.mp3')
         temp_wav = None
@@ -78,20 +184,23 @@ class AudioSteganography:
             audio_path = temp_wav
 
         try:
+            if not scatter_key and not matrix_k:
+                target = sink if sink is not None else io.BytesIO()
+                reader = AudioSteganography._decode_stream(audio_path, target, key, chunk_size)
+                if reader is not None:
+                    return reader.result(sink, target)
+
             with wave.open(audio_path, 'rb') as audio:
-                frames = audio.readframes(audio.getnframes())
+                frames = np.frombuffer(audio.readframes(audio.getnframes()), dtype=np.uint8)
 
-            binary_msg = ''.join(str(byte & 1) for byte in frames)
-            message = ""
-            for i in range(0, len(binary_msg), 8):
-                byte = binary_msg[i:i+8]
-                if byte == '00000000':
-                    break
-                message += chr(int(byte, 2))
+            message = extract_terminated(frames, len(frames), scatter_key=scatter_key,
+                                         matrix_k=matrix_k).decode('latin-1')
 
             if key:
                 message = AudioSteganography.decrypt_message(key, message)
 
+            if sink is not None:
+                return write_text(sink, message)
             return message
 
         finally:
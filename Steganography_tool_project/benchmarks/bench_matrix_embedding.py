@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+from matrix_embedding import embed_bits, extract_terminated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plain LSB vs Hamming matrix embedding")
+    parser.add_argument('--payload-kb', type=int, default=256)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    payload = rng.integers(1, 256, args.payload_kb * 1024, dtype=np.uint8)
+    bits = np.append(np.unpackbits(payload), np.zeros(8, dtype=np.uint8))
+    carrier = rng.integers(0, 256, len(bits) * 40, dtype=np.uint8)
+    print(f"Payload: {len(payload):,} bytes, carrier: {carrier.size:,} elements")
+    print(f"{'mode':>8} {'elements':>12} {'changes':>10} {'bits/change':>12} {'embed MB/s':>11} {'extract MB/s':>13}")
+
+    for k in (None, 2, 3, 4, 5):
+        work = carrier.copy()
+        start = time.perf_counter()
+        changes = embed_bits(work, bits, work.size, matrix_k=k)
+        embed_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        extracted = extract_terminated(work, work.size, matrix_k=k)
+        extract_time = time.perf_counter() - start
+        assert extracted == payload.tobytes()
+
+        elements = len(bits) if k is None else -(-len(bits) // k) * ((1 << k) - 1)
+        megabytes = len(payload) / 2 ** 20
+        print(f"{'LSB' if k is None else f'k={k}':>8} {elements:>12,} {changes:>10,} "
+              f"{len(bits) / max(changes, 1):>12.2f} {megabytes / embed_time:>11.1f} {megabytes / extract_time:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import io
+import time
+import numpy as np
+from reed_solomon import BLOCK_SIZE, encode_blocks, decode_blocks
+from payload_stream import PayloadReader, iter_container
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reed-Solomon ECC layer throughput")
+    parser.add_argument('--payload-kb', type=int, default=4096)
+    parser.add_argument('--damaged', type=float, default=0.01, help="fraction of blocks given errors")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    payload = rng.integers(0, 256, args.payload_kb * 1024, dtype=np.uint8)
+    megabytes = payload.size / 2 ** 20
+    print(f"Payload: {payload.size:,} bytes, {args.damaged:.1%} of blocks damaged")
+    print(f"{'ecc':>5} {'overhead':>9} {'encode MB/s':>12} {'clean MB/s':>11} {'damaged MB/s':>13} {'container MB/s':>15}")
+
+    for nsym in (8, 16, 32, 64):
+        k = BLOCK_SIZE - nsym
+        data = np.zeros(-(-payload.size // k) * k, dtype=np.uint8)
+        data[:payload.size] = payload
+        data = data.reshape(-1, k)
+
+        start = time.perf_counter()
+        codewords = encode_blocks(data, nsym)
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decode_blocks(codewords, nsym)
+        clean_time = time.perf_counter() - start
+
+        damaged = codewords.copy()
+        for block in np.flatnonzero(rng.random(len(damaged)) < args.damaged):
+            positions = rng.choice(BLOCK_SIZE, nsym // 2, replace=False)
+            damaged[block, positions] ^= rng.integers(1, 256, len(positions), dtype=np.uint8)
+        start = time.perf_counter()
+        decoded, _, failed = decode_blocks(damaged, nsym)
+        damaged_time = time.perf_counter() - start
+        assert not failed.any() and np.array_equal(decoded, data)
+
+        # Whole container: framing, encryption and ECC on the way in and out
+        start = time.perf_counter()
+        container = b''.join(iter_container(payload.tobytes(), "bench-key", ecc=nsym))
+        sink = io.BytesIO()
+        assert PayloadReader(sink, "bench-key").feed(container) and sink.getvalue() == payload.tobytes()
+        container_time = time.perf_counter() - start
+
+        print(f"{nsym:>5} {nsym / k:>9.1%} {megabytes / encode_time:>12.1f} {megabytes / clean_time:>11.1f} "
+              f"{megabytes / damaged_time:>13.1f} {megabytes / container_time:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import numpy as np
+from scattering import carrier_positions
+
+
+def timed(func, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def embed_extract(carrier: np.ndarray, bits: np.ndarray, scatter_key: str = None) -> None:
+    positions = carrier_positions(0, len(bits), carrier.size, scatter_key)
+    carrier[positions] = (carrier[positions] & 0xFE) | bits
+    extracted = carrier[carrier_positions(0, len(bits), carrier.size, scatter_key)] & 1
+    assert np.array_equal(extracted, bits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs keyed scattered LSB layout")
+    parser.add_argument('--carrier-mb', type=int, default=64, help="carrier size in millions of elements")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    carrier = rng.integers(0, 256, args.carrier_mb * 10 ** 6, dtype=np.uint8)
+    print(f"Carrier: {carrier.size:,} elements")
+    print(f"{'payload':>10} {'sequential':>12} {'scattered':>12} {'full perm':>12}")
+
+    full_permutation = timed(lambda: rng.permutation(carrier.size), repeat=1)
+    for payload_bytes in (1 << 10, 1 << 14, 1 << 17):
+        bits = rng.integers(0, 2, payload_bytes * 8, dtype=np.uint8)
+        sequential = timed(lambda: embed_extract(carrier, bits))
+        scattered = timed(lambda: embed_extract(carrier, bits, "benchmark-key"))
+        print(f"{payload_bytes:>9}B {sequential * 1000:>10.2f}ms {scattered * 1000:>10.2f}ms "
+              f"{full_permutation * 1000:>10.2f}ms")
+    print(f"A full permutation table would also hold {carrier.size * 8 / 2 ** 20:,.0f} MiB of indices")
+
+
+if __name__ == "__main__":
+    main()
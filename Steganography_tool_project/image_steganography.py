@@ -1,8 +1,23 @@
+import io
 import os
+import shutil
 from PIL import Image
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 import base64
+import numpy as np
+from scattering import text_to_bits
+from matrix_embedding import embed_bits, extract_terminated, elements_for_bits
+from prepared_payload import PreparedPayload, prepared_bits
+from payload_stream import (DEFAULT_CHUNK_SIZE, BitFeeder, PayloadReader, is_stream_source, iter_container_bits,
+                            embed_stream, container_at_start, extract_stream, has_container_magic, write_text,
+                            container_source)
+
+# Uncompressed pixel layouts the tiled mode can patch in place: rawmode -> bytes per pixel.
+# The colour bytes always come first; a fourth alpha/padding byte is left alone. BGR
+# layouts (BMP) are read in RGB order so the bits land where encode() puts them.
+TILED_RAWMODES = {'RGB': 3, 'BGR': 3, 'RGBA': 4, 'BGRA': 4, 'RGBX': 4, 'BGRX': 4}
+DEFAULT_TILE_BYTES = 4 * 1024 * 1024
 
 class ImageSteganography:
     @staticmethod
@@ -18,56 +33,238 @@ class ImageSteganography:
         return decrypted_msg.decode()
 
     @staticmethod
-    def encode(image_path: str, message: str, output_path: str, key: str = None) -> None:
-        """Encodes a secret message into an image using LSB steganography."""
+    def capacity(image_path: str) -> int:
+        """Returns how many message bytes (after encryption) fit into the image."""
         if not os.path.exists(image_path):
             raise FileNotFoundError("Error: Input image file does not exist.")
+        width, height = Image.open(image_path).size
+        return max(width * height * 3 // 8 - 1, 0)  # Minus the null terminator
 
-        img = Image.open(image_path)
-        if key:
-            message = ImageSteganography.encrypt_message(key, message)
+    @staticmethod
+    def _load_pixels(img: Image.Image) -> np.ndarray:
+        pixels = np.array(img)
+        if pixels.ndim != 3 or pixels.shape[2] < 3:
+            raise ValueError(f"Unsupported image mode: {img.mode}")
+        return pixels
 
-               # Convert message to binary
-        binary_msg = ''.join(format(ord(c), '08b') for c in message) + '00000000'  # Null terminator
-        pixels = list(img.getdata())
-        width, height = img.size
+    @staticmethod
+    def _element_index(positions: np.ndarray, channels: int) -> np.ndarray:
+        # Carrier element e is RGB channel e % 3 of pixel e // 3
+        return positions // 3 * channels + positions % 3
+
+    @staticmethod
+    def encode(image_path: str, message, output_path: str, key: str = None, scatter_key: str = None,
+               matrix_k: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, ecc: int = None) -> None:
+        """Encodes a secret message into an image using LSB steganography.
+
+        message is normally a str. It may also be bytes, a binary file-like object
+        or an iterable of bytes, which is framed as a binary container and read
+        chunk_size bytes at a time, or a PreparedPayload that is already
+        encrypted and framed. With a scatter_key the bits go to keyed
+        pseudo-random RGB channels instead of the first pixels; with matrix_k every
+        2^k - 1 channels carry k bits with at most one change. Decoding needs the
+        same scatter_key and matrix_k. With ecc (Reed-Solomon parity bytes per
+        255-byte block) even a str message is framed as a container, so that
+        damaged bits are repaired on decoding.
+        """
+        if ecc and isinstance(message, PreparedPayload):
+            raise ValueError("A PreparedPayload has fixed framing; ecc cannot be added to it")
+        if not os.path.exists(image_path):
+            raise FileNotFoundError("Error: Input image file does not exist.")
 
-        if len(binary_msg) > width * height * 3:
-            raise ValueError("Message too large for the image.")
+        img = Image.open(image_path)
+        pixels = ImageSteganography._load_pixels(img)
+        width, height = img.size
+        channels = pixels.shape[2]
+        index_map = lambda positions: ImageSteganography._element_index(positions, channels)
 
-        idx = 0
-        for i in range(len(pixels)):
-            pixel = list(pixels[i])
-            for j in range(3):  # RGB channels
-                if idx < len(binary_msg):
-                    pixel[j] = (pixel[j] & ~1) | int(binary_msg[idx])
-                    idx += 1
-            pixels[i] = tuple(pixel)
+        if not ecc and (isinstance(message, PreparedPayload) or not is_stream_source(message)):
+            if isinstance(message, PreparedPayload):
+                bits = prepared_bits(message, 'image', key)
+            else:
+                if key:
+                    message = ImageSteganography.encrypt_message(key, message)
+                # Convert message to binary
+                bits = np.append(text_to_bits(message), np.zeros(8, dtype=np.uint8))  # Null terminator
+            if elements_for_bits(len(bits), matrix_k) > width * height * 3:
+                raise ValueError("Message too large for the image.")
+            embed_bits(pixels.reshape(-1), bits, width * height * 3, index_map, scatter_key, matrix_k)
+        else:
+            if scatter_key or matrix_k:
+                raise ValueError("Streamed payloads only support the sequential layout")
+            source, text = container_source(message)
+            embed_stream(pixels.reshape(-1), source, width * height * 3, index_map, key, chunk_size, ecc, text)
 
-        encoded_img = Image.new(img.mode, img.size)
-        encoded_img.putdata(pixels)
+        encoded_img = Image.frombytes(img.mode, img.size, pixels.tobytes())
         encoded_img.save(output_path)
         print(f"Message successfully encoded into {output_path}")
 
     @staticmethod
-    def decode(image_path: str, key: str = None) -> str:
-        """Decodes a secret message from an image using LSB steganography."""
+    def decode(image_path: str, key: str = None, scatter_key: str = None, matrix_k: int = None, sink=None):
+        """Decodes a secret message from an image using LSB steganography.
+
+        Returns the message as str, or as bytes for streamed payloads. With a sink
+        (a binary file-like object) the payload is written there instead and the
+        number of bytes written is returned.
+        """
         img = Image.open(image_path)
-        pixels = list(img.getdata())
-        binary_msg = ""
-        for pixel in pixels:
-            for value in pixel[:3]:  # RGB channels
-                binary_msg += str(value & 1)
+        pixels = ImageSteganography._load_pixels(img)
+        channels = pixels.shape[2]
+        index_map = lambda positions: ImageSteganography._element_index(positions, channels)
+        domain_size = img.size[0] * img.size[1] * 3
+
+        if not scatter_key and not matrix_k and container_at_start(pixels.reshape(-1), domain_size, index_map):
+            target = sink if sink is not None else io.BytesIO()
+            reader = extract_stream(pixels.reshape(-1), domain_size, target, index_map, key)
+            print(f"Message successfully decoded ")
+            return reader.result(sink, target)
 
         # Extract message up to null terminator
-        message = ""
-        for i in range(0, len(binary_msg), 8):
-            byte = binary_msg[i:i+8]
-            if byte == '00000000':
-                break
-            message += chr(int(byte, 2))
+        message = extract_terminated(pixels.reshape(-1), domain_size, index_map,
+                                     scatter_key, matrix_k).decode('latin-1')
+
+        if key:
+            message = ImageSteganography.decrypt_message(key, message)
+        print(f"Message successfully decoded ")
+        if sink is not None:
+            return write_text(sink, message)
+        return message
+
+    @staticmethod
+    def _raw_regions(image_path: str) -> list:
+        """Lists (offset, row_bytes, stride, rows, rawmode, bottom_up) for the raw tiles of every page.
+
+        Only the image headers are parsed; no pixel data is decoded.
+        """
+        regions = []
+        with Image.open(image_path) as img:
+            for page in range(getattr(img, 'n_frames', 1)):
+                img.seek(page)
+                for codec, extents, offset, args in img.tile:
+                    args = (args,) if isinstance(args, str) else tuple(args)
+                    rawmode, stride, orientation = (args + (0, 1))[:3]
+                    if codec != 'raw' or rawmode not in TILED_RAWMODES:
+                        raise ValueError(f"Tiled mode needs uncompressed RGB/RGBA pixel data, found {codec} {rawmode}")
+                    row_bytes = (extents[2] - extents[0]) * TILED_RAWMODES[rawmode]
+                    # A negative orientation (BMP) stores the rows bottom-up
+                    regions.append((offset, row_bytes, stride or row_bytes, extents[3] - extents[1], rawmode,
+                                    orientation < 0))
+        return regions
+
+    @staticmethod
+    def _iter_tiles(f, regions: list, tile_bytes: int):
+        """Yields (offset, buffer, bytes read, colour view) for consecutive bands of rows, one in memory at a time.
+
+        Bands run top to bottom and the colour view is in RGB order whatever the file layout.
+        """
+        for offset, row_bytes, stride, rows, rawmode, bottom_up in regions:
+            band_rows = max(tile_bytes // stride, 1)
+            for first_row in range(0, rows, band_rows):
+                count = min(band_rows, rows - first_row)
+                start = offset + ((rows - first_row - count) if bottom_up else first_row) * stride
+                f.seek(start)
+                buffer = bytearray(f.read(count * stride))
+                length = len(buffer)
+                buffer += bytes(count * stride - length)  # Last row may lack its padding
+                band = np.frombuffer(buffer, dtype=np.uint8).reshape(count, stride)
+                if bottom_up:
+                    band = band[::-1]
+                colours = band[:, :row_bytes].reshape(count, -1, TILED_RAWMODES[rawmode])[:, :, :3]
+                if rawmode.startswith('BGR'):
+                    colours = colours[:, :, ::-1]
+                yield start, buffer, length, colours
+
+    @staticmethod
+    def encode_tiled(image_path: str, message, output_path: str, key: str = None,
+                     tile_bytes: int = DEFAULT_TILE_BYTES, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     ecc: int = None) -> None:
+        """Encodes into an uncompressed TIFF (incl. multi-page), BMP or PPM with bounded memory.
+
+        The file is copied as-is and only the bands of rows the payload covers are
+        read, patched and written back, so peak memory stays around tile_bytes
+        whatever the image size. Extra TIFF pages add capacity. message and ecc
+        are as for encode(); decode with decode_tiled().
+        """
+        if ecc and isinstance(message, PreparedPayload):
+            raise ValueError("A PreparedPayload has fixed framing; ecc cannot be added to it")
+        if not os.path.exists(image_path):
+            raise FileNotFoundError("Error: Input image file does not exist.")
+        if os.path.splitext(image_path)[1].lower() != os.path.splitext(output_path)[1].lower():
+            raise ValueError("Tiled mode keeps the input format; use the same extension for the output")
+        regions = ImageSteganography._raw_regions(image_path)
+
+        if isinstance(message, PreparedPayload):
+            feeder = BitFeeder([prepared_bits(message, 'image', key)])
+        elif ecc or is_stream_source(message):
+            source, text = container_source(message)
+            feeder = BitFeeder(iter_container_bits(source, key, chunk_size, ecc, text))
+        else:
+            if key:
+                message = ImageSteganography.encrypt_message(key, message)
+            feeder = BitFeeder([np.append(text_to_bits(message), np.zeros(8, dtype=np.uint8))])
+
+        if os.path.abspath(image_path) != os.path.abspath(output_path):
+            shutil.copyfile(image_path, output_path)
+        try:
+            with open(output_path, 'r+b') as f:
+                for start, buffer, length, colours in ImageSteganography._iter_tiles(f, regions, tile_bytes):
+                    if feeder.exhausted:
+                        break
+                    flat = colours.reshape(-1)
+                    bits = feeder.take(flat.size)
+                    flat[:len(bits)] = (flat[:len(bits)] & 0xFE) | bits
+                    colours[...] = flat.reshape(colours.shape)
+                    f.seek(start)
+                    f.write(buffer[:length])
+            if not feeder.exhausted:
+                raise ValueError("Message too large for the image.")
+        except Exception:
+            if os.path.abspath(image_path) != os.path.abspath(output_path) and os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+        print(f"Message successfully encoded into {output_path}")
+
+    @staticmethod
+    def decode_tiled(image_path: str, key: str = None, sink=None, tile_bytes: int = DEFAULT_TILE_BYTES):
+        """Decodes a payload written by encode_tiled(), reading one band of rows at a time.
+
+        Returns str or bytes like decode(); with a sink the payload is written
+        there and the number of bytes written is returned.
+        """
+        regions = ImageSteganography._raw_regions(image_path)
+        target = sink if sink is not None else io.BytesIO()
+        reader = None
+        text = bytearray()
+        pending = np.zeros(0, dtype=np.uint8)
+        finished = False
+
+        with open(image_path, 'rb') as f:
+            for _, _, _, colours in ImageSteganography._iter_tiles(f, regions, tile_bytes):
+                lsbs = np.concatenate([pending, colours.reshape(-1) & 1])
+                whole = len(lsbs) - len(lsbs) % 8
+                pending = lsbs[whole:]
+                values = np.packbits(lsbs[:whole]).tobytes()
+                if reader is None and not text and has_container_magic(values):
+                    reader = PayloadReader(target, key)
+                if reader is not None:
+                    finished = reader.feed(values)
+                else:
+                    end = values.find(b'\0')
+                    text += values if end < 0 else values[:end]
+                    finished = end >= 0
+                if finished:
+                    break
+
+        if reader is not None:
+            if not finished:
+                raise ValueError("Image ended before the end of the payload")
+            print(f"Message successfully decoded ")
+            return reader.result(sink, target)
 
+        message = text.decode('latin-1')
         if key:
             message = ImageSteganography.decrypt_message(key, message)
         print(f"Message successfully decoded ")
+        if sink is not None:
+            return write_text(sink, message)
         return message
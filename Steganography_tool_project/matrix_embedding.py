@@ -0,0 +1,101 @@
+import numpy as np
+from scattering import carrier_positions
+
+MAX_MATRIX_K = 16
+
+
+def block_size(k: int) -> int:
+    """Number of carrier elements a Hamming block needs to hold k message bits."""
+    if not 1 <= k <= MAX_MATRIX_K:
+        raise ValueError(f"matrix_k must be between 1 and {MAX_MATRIX_K}")
+    return (1 << k) - 1
+
+
+def elements_for_bits(bit_count: int, k: int = None) -> int:
+    """Number of carrier elements needed for bit_count message bits."""
+    if not k:
+        return bit_count
+    return -(-bit_count // k) * block_size(k)
+
+
+def _syndromes(lsbs: np.ndarray, k: int) -> np.ndarray:
+    # Syndrome of a block = XOR of the (1-based) column indices of its set bits
+    n = block_size(k)
+    blocks = lsbs.reshape(-1, n).astype(np.int32)
+    return np.bitwise_xor.reduce(blocks * np.arange(1, n + 1, dtype=np.int32), axis=1)
+
+
+def hamming_embed(cover_lsbs: np.ndarray, bits: np.ndarray, k: int) -> np.ndarray:
+    """Returns the element indices to flip so that cover_lsbs carries bits.
+
+    Each block of 2^k - 1 elements carries k bits with at most one change. bits
+    is zero-padded to a multiple of k; cover_lsbs must hold exactly the blocks
+    needed (see elements_for_bits).
+    """
+    n = block_size(k)
+    padded = np.zeros(elements_for_bits(len(bits), k) // n * k, dtype=np.uint8)
+    padded[:len(bits)] = bits
+    weights = 1 << np.arange(k - 1, -1, -1, dtype=np.int32)
+    values = padded.reshape(-1, k).astype(np.int32) @ weights
+
+    columns = _syndromes(cover_lsbs, k) ^ values
+    blocks = np.flatnonzero(columns)
+    return blocks * n + columns[blocks] - 1
+
+
+def hamming_extract(lsbs: np.ndarray, k: int) -> np.ndarray:
+    """Returns the k bits carried by each block of lsbs, in order."""
+    syndromes = _syndromes(lsbs, k)
+    shifts = np.arange(k - 1, -1, -1, dtype=np.int32)
+    return ((syndromes[:, None] >> shifts) & 1).astype(np.uint8).reshape(-1)
+
+
+def embed_bits(carrier: np.ndarray, bits: np.ndarray, domain_size: int, index_map=None,
+               scatter_key: str = None, matrix_k: int = None) -> int:
+    """Writes bits into the LSBs of a flat carrier array; returns how many elements changed.
+
+    domain_size is the number of usable carrier elements and index_map, if given,
+    turns element positions into indices of carrier (e.g. skipping alpha).
+    """
+    count = elements_for_bits(len(bits), matrix_k)
+    positions = carrier_positions(0, count, domain_size, scatter_key)
+    if index_map is not None:
+        positions = index_map(positions)
+
+    if matrix_k:
+        flips = positions[hamming_embed(carrier[positions] & 1, bits, matrix_k)]
+        carrier[flips] ^= 1
+        return len(flips)
+
+    changed = int(np.count_nonzero((carrier[positions] & 1) != bits))
+    carrier[positions] = (carrier[positions] & 0xFE) | bits
+    return changed
+
+
+def extract_terminated(carrier: np.ndarray, domain_size: int, index_map=None,
+                       scatter_key: str = None, matrix_k: int = None) -> bytes:
+    """Reads bytes from the carrier LSBs up to a null terminator, a growing chunk at a time."""
+    unit = block_size(matrix_k) if matrix_k else 8
+    total = domain_size - domain_size % unit
+    pending = np.zeros(0, dtype=np.uint8)
+    message = []
+    start, chunk = 0, 1024
+    while start < total:
+        count = min(chunk * unit, total - start)
+        positions = carrier_positions(start, count, domain_size, scatter_key)
+        if index_map is not None:
+            positions = index_map(positions)
+        lsbs = carrier[positions] & 1
+        pending = np.concatenate([pending, hamming_extract(lsbs, matrix_k) if matrix_k else lsbs])
+
+        whole = len(pending) - len(pending) % 8
+        values = np.packbits(pending[:whole])
+        pending = pending[whole:]
+        terminator = np.flatnonzero(values == 0)
+        if len(terminator):
+            message.append(values[:terminator[0]])
+            break
+        message.append(values)
+        start += count
+        chunk *= 2
+    return np.concatenate(message).tobytes() if message else b""
@@ -0,0 +1,29 @@
+import os
+from image_steganography import ImageSteganography
+from audio_steganography import AudioSteganography
+from video_steganography import VideoSteganography
+
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.jpg', '.jpeg', '.tif', '.tiff', '.ppm')
+AUDIO_EXTENSIONS = ('.wav', '.mp3')
+VIDEO_EXTENSIONS = ('.avi', '.mp4')
+
+
+def media_type(path: str) -> str:
+    """Returns 'image', 'audio' or 'video' based on the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    if ext in AUDIO_EXTENSIONS:
+        return 'audio'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    raise ValueError(f"Unsupported media type: {path}")
+
+
+def get_engine(path: str):
+    """Returns the steganography class that handles the given file."""
+    return {
+        'image': ImageSteganography,
+        'audio': AudioSteganography,
+        'video': VideoSteganography,
+    }[media_type(path)]
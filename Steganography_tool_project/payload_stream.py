@@ -0,0 +1,368 @@
+import os
+import struct
+import numpy as np
+from Crypto.Cipher import AES
+from Crypto.Hash import SHA256
+from reed_solomon import BLOCK_SIZE, check_symbols, data_size, decode_blocks, encode_blocks
+
+# Binary payload container:
+#   magic (4) | version (1) | flags (1) | [nonce (16) if encrypted]
+#   then chunks of: length (4, big-endian) | data, ended by a zero-length chunk
+#   then [EAX tag (16) if encrypted]
+# The magic starts with 0x89, which never begins a text message and, read as
+# the top of the video engine's 64-bit length header, would be an impossible length.
+#
+# With FLAG_ECC the header also carries the number of Reed-Solomon parity bytes
+# and is written HEADER_COPIES times (read back by bitwise majority vote);
+# everything after it is cut into 255-byte RS blocks, the last one zero-padded.
+# FLAG_TEXT marks a str message, which decoders return as str again.
+MAGIC = b'\x89STG'
+VERSION = 1
+FLAG_ENCRYPTED = 0x01
+FLAG_ECC = 0x02
+FLAG_TEXT = 0x04
+HEADER = struct.Struct('>4sBB')
+ECC_HEADER = struct.Struct('>4sBBB')
+HEADER_COPIES = 3
+# Carrier bytes a decoder should look at to recognise any container header
+PROBE_BYTES = ECC_HEADER.size * HEADER_COPIES
+CHUNK_LENGTH = struct.Struct('>I')
+NONCE_SIZE = 16
+TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _cipher(key: str, nonce: bytes):
+    return AES.new(SHA256.new(key.encode()).digest(), AES.MODE_EAX, nonce=nonce)
+
+
+def is_stream_source(message) -> bool:
+    """True for payloads that go through the binary container instead of text framing."""
+    return not isinstance(message, str)
+
+
+def _iter_source(source, chunk_size: int):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = bytes(source)
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, 'read'):
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            if isinstance(data, str):
+                raise ValueError("Stream payloads must be opened in binary mode")
+            yield data
+    else:
+        for data in source:
+            if data:
+                yield bytes(data)
+
+
+def _iter_body(source, key: str, chunk_size: int):
+    cipher = None
+    if key:
+        nonce = os.urandom(NONCE_SIZE)
+        cipher = _cipher(key, nonce)
+        yield nonce
+
+    for data in _iter_source(source, chunk_size):
+        if cipher:
+            data = cipher.encrypt(data)
+        yield CHUNK_LENGTH.pack(len(data)) + data
+
+    trailer = CHUNK_LENGTH.pack(0)
+    if cipher:
+        trailer += cipher.digest()
+    yield trailer
+
+
+def _ecc_encode(chunks, nsym: int):
+    """Re-chunks a byte stream into Reed-Solomon blocks, zero-padding the last one."""
+    k = data_size(nsym)
+    pending = bytearray()
+    for data in chunks:
+        pending += data
+        whole = len(pending) - len(pending) % k
+        if whole:
+            yield encode_blocks(np.frombuffer(bytes(pending[:whole]), dtype=np.uint8), nsym).tobytes()
+            del pending[:whole]
+    if pending:
+        pending += bytes(k - len(pending))
+        yield encode_blocks(np.frombuffer(bytes(pending), dtype=np.uint8), nsym).tobytes()
+
+
+def iter_container(source, key: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE, ecc: int = None,
+                   text: bool = False):
+    """Yields the framed (and optionally encrypted) container bytes for a byte source.
+
+    source may be bytes, a binary file-like object or an iterable of bytes; it is
+    consumed chunk_size bytes at a time. With ecc, every 255 - ecc bytes get ecc
+    Reed-Solomon parity bytes, so up to ecc // 2 damaged bytes per block are
+    repaired on decoding. text records that the payload is UTF-8 text.
+    """
+    flags = (FLAG_ENCRYPTED if key else 0) | (FLAG_TEXT if text else 0)
+    body = _iter_body(source, key, chunk_size)
+    if not ecc:
+        yield HEADER.pack(MAGIC, VERSION, flags)
+        yield from body
+        return
+    check_symbols(ecc)
+    yield ECC_HEADER.pack(MAGIC, VERSION, flags | FLAG_ECC, ecc) * HEADER_COPIES
+    yield from _ecc_encode(body, ecc)
+
+
+def iter_container_bits(source, key: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE, ecc: int = None,
+                        text: bool = False):
+    """Same as iter_container, as 0/1 uint8 arrays."""
+    for data in iter_container(source, key, chunk_size, ecc, text):
+        yield np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+class BitFeeder:
+    """Hands out bits from a chunked bit iterator in arbitrarily sized pieces."""
+
+    def __init__(self, bit_chunks):
+        self._chunks = iter(bit_chunks)
+        self._pending = np.zeros(0, dtype=np.uint8)
+        self.consumed = 0
+
+    def _refill(self) -> bool:
+        while not len(self._pending):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            self._pending = chunk
+        return True
+
+    def take(self, count: int) -> np.ndarray:
+        """Returns up to count bits; fewer only once the source is exhausted."""
+        parts, have = [], 0
+        while have < count and self._refill():
+            part = self._pending[:count - have]
+            self._pending = self._pending[len(part):]
+            parts.append(part)
+            have += len(part)
+        self.consumed += have
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint8)
+
+    @property
+    def exhausted(self) -> bool:
+        return not self._refill()
+
+
+def _voted_header(first_bytes: bytes) -> bytes:
+    copies = np.frombuffer(first_bytes[:PROBE_BYTES], dtype=np.uint8).reshape(HEADER_COPIES, -1)
+    a, b, c = copies
+    return ((a & b) | (a & c) | (b & c)).tobytes()
+
+
+def parse_header(first_bytes: bytes):
+    """Returns (flags, ecc, header_size) for the container header at the start of first_bytes.
+
+    first_bytes should hold PROBE_BYTES bytes so a damaged ECC header can be
+    recovered by majority vote. Raises ValueError if there is no container.
+    """
+    if len(first_bytes) >= PROBE_BYTES:
+        magic, version, flags, ecc = ECC_HEADER.unpack(_voted_header(first_bytes))
+        if magic == MAGIC and version == VERSION and flags & FLAG_ECC and 0 < ecc < BLOCK_SIZE:
+            return flags, ecc, PROBE_BYTES
+    if len(first_bytes) >= HEADER.size:
+        magic, version, flags = HEADER.unpack(first_bytes[:HEADER.size])
+        if magic == MAGIC and version == VERSION and not flags & FLAG_ECC:
+            return flags, None, HEADER.size
+    raise ValueError("No stream payload found")
+
+
+def has_container_magic(first_bytes: bytes) -> bool:
+    if first_bytes[:len(MAGIC)] == MAGIC:
+        return True
+    return len(first_bytes) >= PROBE_BYTES and _voted_header(first_bytes)[:len(MAGIC)] == MAGIC
+
+
+class PayloadReader:
+    """Incrementally parses container bytes and writes the payload to a sink.
+
+    Call feed() with consecutive carrier bytes until it returns True. When the
+    payload is encrypted, the authentication tag is only checked at the end, so
+    a sink may already hold data when a ValueError reports tampering. For ECC
+    containers only the Reed-Solomon blocks the payload occupies are decoded;
+    corrected counts the bytes repaired and text is set for str messages.
+    """
+
+    def __init__(self, sink, key: str = None):
+        self.sink = sink
+        self.key = key
+        self.written = 0
+        self.corrected = 0
+        self.text = False
+        self.done = False
+        self._buffer = bytearray()
+        self._coded = bytearray()
+        self._ecc = None
+        self._state = 'header'
+        self._cipher = None
+        self._remaining = 0
+
+    def _take(self, size: int):
+        if len(self._buffer) < size:
+            return None
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < PROBE_BYTES:
+            # Wait for all header copies so a damaged ECC header can be voted on
+            return False
+        flags, self._ecc, size = parse_header(bytes(self._buffer[:PROBE_BYTES]))
+        del self._buffer[:size]
+        if flags & FLAG_ENCRYPTED and not self.key:
+            raise ValueError("Payload is encrypted; a key is required")
+        self.text = bool(flags & FLAG_TEXT)
+        self._state = 'nonce' if flags & FLAG_ENCRYPTED else 'length'
+        if self._ecc:
+            self._coded, self._buffer = self._buffer, bytearray()
+        return True
+
+    def _needed(self) -> int:
+        """Decoded bytes the parser needs before it can make progress."""
+        size = {'nonce': NONCE_SIZE, 'length': CHUNK_LENGTH.size, 'tag': TAG_SIZE}.get(self._state)
+        if size is None:
+            # Also fetch the next chunk length along with the rest of this chunk
+            size = self._remaining + CHUNK_LENGTH.size
+        return max(size - len(self._buffer), 1)
+
+    def _decode_blocks(self) -> bool:
+        """Corrects just enough Reed-Solomon blocks for the parser; False if none are available."""
+        k = data_size(self._ecc)
+        available = len(self._coded) // BLOCK_SIZE
+        count = min(available, -(-self._needed() // k))
+        if not count:
+            return False
+        blocks = np.frombuffer(bytes(self._coded[:count * BLOCK_SIZE]), dtype=np.uint8)
+        data, corrected, failed = decode_blocks(blocks, self._ecc)
+        if failed.any():
+            raise ValueError("Payload is too damaged to correct")
+        del self._coded[:count * BLOCK_SIZE]
+        self.corrected += corrected
+        self._buffer += data.tobytes()
+        return True
+
+    def feed(self, data: bytes) -> bool:
+        if self._state == 'header':
+            self._buffer += data
+            if not self._read_header():
+                return False
+        elif self._ecc:
+            self._coded += data
+        else:
+            self._buffer += data
+
+        while not self._parse() and self._ecc:
+            if not self._decode_blocks():
+                break
+        return self.done
+
+    def _parse(self) -> bool:
+        while not self.done:
+            if self._state == 'nonce':
+                nonce = self._take(NONCE_SIZE)
+                if nonce is None:
+                    break
+                self._cipher = _cipher(self.key, nonce)
+                self._state = 'length'
+            elif self._state == 'length':
+                length = self._take(CHUNK_LENGTH.size)
+                if length is None:
+                    break
+                self._remaining = CHUNK_LENGTH.unpack(length)[0]
+                if self._remaining:
+                    self._state = 'data'
+                elif self._cipher:
+                    self._state = 'tag'
+                else:
+                    self.done = True
+            elif self._state == 'data':
+                if not self._buffer:
+                    break
+                chunk = bytes(self._buffer[:self._remaining])
+                del self._buffer[:len(chunk)]
+                self._remaining -= len(chunk)
+                if self._cipher:
+                    chunk = self._cipher.decrypt(chunk)
+                self.sink.write(chunk)
+                self.written += len(chunk)
+                if not self._remaining:
+                    self._state = 'length'
+            elif self._state == 'tag':
+                tag = self._take(TAG_SIZE)
+                if tag is None:
+                    break
+                try:
+                    self._cipher.verify(tag)
+                except ValueError:
+                    raise ValueError("Decryption failed: payload authentication failed")
+                self.done = True
+        return self.done
+
+    def result(self, sink=None, target=None):
+        """What decode() returns: the byte count with a caller's sink, else the payload from target."""
+        if sink is not None:
+            return self.written
+        data = target.getvalue()
+        return data.decode('utf-8') if self.text else data
+
+
+def embed_stream(carrier: np.ndarray, source, domain_size: int, index_map=None, key: str = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, ecc: int = None, text: bool = False) -> int:
+    """Writes a container into the first LSBs of a flat carrier array; returns the bits used."""
+    position = 0
+    for bits in iter_container_bits(source, key, chunk_size, ecc, text):
+        if position + len(bits) > domain_size:
+            raise ValueError("Message too large for the carrier.")
+        index = np.arange(position, position + len(bits))
+        if index_map is not None:
+            index = index_map(index)
+        carrier[index] = (carrier[index] & 0xFE) | bits
+        position += len(bits)
+    return position
+
+
+def container_at_start(carrier: np.ndarray, domain_size: int, index_map=None) -> bool:
+    """True if the first LSBs of a flat carrier array hold a container header."""
+    if domain_size < len(MAGIC) * 8:
+        return False
+    index = np.arange(min(PROBE_BYTES * 8, domain_size - domain_size % 8))
+    if index_map is not None:
+        index = index_map(index)
+    return has_container_magic(np.packbits(carrier[index] & 1).tobytes())
+
+
+def extract_stream(carrier: np.ndarray, domain_size: int, sink, index_map=None, key: str = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> PayloadReader:
+    """Reads a container from the first LSBs of a flat carrier array into sink; returns the finished reader."""
+    reader = PayloadReader(sink, key)
+    total = domain_size - domain_size % 8
+    for start in range(0, total, chunk_size * 8):
+        index = np.arange(start, min(start + chunk_size * 8, total))
+        if index_map is not None:
+            index = index_map(index)
+        if reader.feed(np.packbits(carrier[index] & 1).tobytes()):
+            return reader
+    raise ValueError("Carrier ended before the end of the payload")
+
+
+def container_source(message):
+    """Returns (source, text) for embedding message as a container; str messages become UTF-8."""
+    if isinstance(message, str):
+        return message.encode('utf-8'), True
+    return message, False
+
+
+def write_text(sink, message: str) -> int:
+    """Writes a text-framed message to a sink as UTF-8; returns bytes written."""
+    data = message.encode('utf-8')
+    sink.write(data)
+    return len(data)
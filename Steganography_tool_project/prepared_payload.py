@@ -0,0 +1,139 @@
+import struct
+import numpy as np
+from multiprocessing import shared_memory
+from scattering import text_to_bits
+
+# Framing schemes used by the engines
+TEXT_SCHEME = 'text'      # image and audio: message bytes + null terminator
+LENGTH_SCHEME = 'length'  # video: 64-bit bit count + message bytes
+SCHEMES = (TEXT_SCHEME, LENGTH_SCHEME)
+MEDIA_SCHEMES = {'image': TEXT_SCHEME, 'audio': TEXT_SCHEME, 'video': LENGTH_SCHEME}
+
+
+def _frame(scheme: str, message: str, key: str = None) -> bytes:
+    # Imported here because the engines themselves import this module
+    if scheme == TEXT_SCHEME:
+        from image_steganography import ImageSteganography
+        text = ImageSteganography.encrypt_message(key, message) if key else message
+        return np.packbits(text_to_bits(text)).tobytes() + b'\0'
+    from video_steganography import VideoSteganography
+    text = VideoSteganography.encrypt_message(key, message) if key else message
+    data = np.packbits(text_to_bits(text)).tobytes()
+    return struct.pack('>Q', len(data) * 8) + data
+
+
+def _layout(packed: dict) -> dict:
+    layout, offset = {}, 0
+    for scheme, array in packed.items():
+        layout[scheme] = (offset, len(array))
+        offset += len(array)
+    return layout
+
+
+def _attach(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always tracks; pool workers share the owner's tracker, so this is harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+class PreparedPayload:
+    """A message encrypted and framed once, for stamping into many carriers.
+
+    Holds the packed bits for every framing the engines use, as read-only uint8
+    arrays, so it can be shared between threads as-is. Pass it as the message
+    to any engine's encode() (without a key; the key is already applied).
+    After share(), pickling it for a worker process sends only the name of a
+    shared memory block instead of the payload.
+    """
+
+    __slots__ = ('_packed', '_errors', '_block', '_owner')
+
+    def __init__(self, message: str, key: str = None, media: tuple = ('image', 'audio', 'video')):
+        packed, errors = {}, {}
+        for scheme in {MEDIA_SCHEMES[m] for m in media}:
+            try:
+                packed[scheme] = np.frombuffer(_frame(scheme, message, key or None), dtype=np.uint8)
+            except ValueError as e:
+                # e.g. a key AES-ECB rejects only matters if that media type is used
+                errors[scheme] = str(e)
+        self._init(packed, errors, None, False)
+
+    def _init(self, packed: dict, errors: dict, block, owner: bool) -> None:
+        for array in packed.values():
+            array.flags.writeable = False
+        object.__setattr__(self, '_packed', packed)
+        object.__setattr__(self, '_errors', errors)
+        object.__setattr__(self, '_block', block)
+        object.__setattr__(self, '_owner', owner)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PreparedPayload is immutable")
+
+    def packed(self, scheme: str) -> np.ndarray:
+        """Returns the framed payload for a scheme as a read-only packed uint8 array."""
+        if scheme in self._errors:
+            raise ValueError(self._errors[scheme])
+        if scheme not in self._packed:
+            raise ValueError(f"Payload was not prepared for the '{scheme}' framing")
+        return self._packed[scheme]
+
+    def bits(self, scheme: str) -> np.ndarray:
+        """Returns the framed payload for a scheme as a 0/1 uint8 array."""
+        return np.unpackbits(self.packed(scheme))
+
+    def bits_for(self, media: str) -> np.ndarray:
+        return self.bits(MEDIA_SCHEMES[media])
+
+    def share(self) -> 'PreparedPayload':
+        """Returns a copy backed by shared memory; call unlink() on it once all workers are done."""
+        layout = _layout(self._packed)
+        size = sum(len(array) for array in self._packed.values())
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for scheme, (start, size) in layout.items():
+            block.buf[start:start + size] = self._packed[scheme].tobytes()
+        return PreparedPayload._from_block(block, layout, dict(self._errors), owner=True)
+
+    @staticmethod
+    def _from_block(block, layout: dict, errors: dict, owner: bool = False) -> 'PreparedPayload':
+        payload = object.__new__(PreparedPayload)
+        packed = {scheme: np.frombuffer(block.buf, dtype=np.uint8, count=size, offset=start)
+                  for scheme, (start, size) in layout.items()}
+        payload._init(packed, errors, block, owner)
+        return payload
+
+    @staticmethod
+    def _attach(name: str, layout: dict, errors: dict) -> 'PreparedPayload':
+        return PreparedPayload._from_block(_attach(name), layout, errors)
+
+    def __reduce__(self):
+        if self._block is None:
+            return PreparedPayload._from_bytes, ({s: a.tobytes() for s, a in self._packed.items()}, self._errors)
+        return PreparedPayload._attach, (self._block.name, _layout(self._packed), self._errors)
+
+    @staticmethod
+    def _from_bytes(packed: dict, errors: dict) -> 'PreparedPayload':
+        payload = object.__new__(PreparedPayload)
+        payload._init({s: np.frombuffer(data, dtype=np.uint8) for s, data in packed.items()}, errors, None, False)
+        return payload
+
+    def close(self) -> None:
+        """Releases this process's view of the shared memory block."""
+        if self._block is not None:
+            object.__setattr__(self, '_packed', {})
+            self._block.close()
+
+    def unlink(self) -> None:
+        """Closes and frees the shared memory block (owner only)."""
+        block, owner = self._block, self._owner
+        self.close()
+        if block is not None and owner:
+            block.unlink()
+
+
+def prepared_bits(payload: PreparedPayload, media: str, key: str = None) -> np.ndarray:
+    """Framed bits of a PreparedPayload for an engine; the key must not be given twice."""
+    if key:
+        raise ValueError("A PreparedPayload is already encrypted; do not pass a key with it")
+    return payload.bits_for(media)
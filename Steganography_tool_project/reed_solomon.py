@@ -0,0 +1,244 @@
+import numpy as np
+from functools import lru_cache
+
+# Reed-Solomon over GF(256) with the 0x11d primitive polynomial and generator
+# roots alpha^0 .. alpha^(nsym-1). A block is 255 bytes: 255 - nsym data bytes
+# followed by nsym parity bytes, and up to nsym // 2 corrupted bytes per block
+# are corrected.
+PRIMITIVE = 0x11d
+BLOCK_SIZE = 255
+
+
+def _tables():
+    exp = np.zeros(1025, dtype=np.uint8)
+    log = np.zeros(256, dtype=np.int16)
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= PRIMITIVE
+    exp[255:510] = exp[:255]
+    # log(0) points past the doubled table, so any product with 0 looks up a 0
+    log[0] = 512
+    return exp, log
+
+
+GF_EXP, GF_LOG = _tables()
+_EXP = GF_EXP[:510].tolist()
+_LOG = GF_LOG.tolist()
+
+
+def check_symbols(nsym: int) -> None:
+    if not 1 <= nsym < BLOCK_SIZE:
+        raise ValueError(f"ecc must be between 1 and {BLOCK_SIZE - 1} parity bytes")
+
+
+def data_size(nsym: int) -> int:
+    """Data bytes carried by each 255-byte block."""
+    check_symbols(nsym)
+    return BLOCK_SIZE - nsym
+
+
+# Scalar arithmetic, used only for blocks that need correcting
+
+def _mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def _div(a: int, b: int) -> int:
+    if a == 0:
+        return 0
+    return _EXP[(_LOG[a] + 255 - _LOG[b]) % 255]
+
+
+def _pow(x: int, power: int) -> int:
+    return _EXP[(_LOG[x] * power) % 255]
+
+
+def _inverse(x: int) -> int:
+    return _EXP[255 - _LOG[x]]
+
+
+def _poly_scale(p: list, x: int) -> list:
+    return [_mul(c, x) for c in p]
+
+
+def _poly_add(p: list, q: list) -> list:
+    r = [0] * max(len(p), len(q))
+    for i, c in enumerate(p):
+        r[i + len(r) - len(p)] = c
+    for i, c in enumerate(q):
+        r[i + len(r) - len(q)] ^= c
+    return r
+
+
+def _poly_mul(p: list, q: list) -> list:
+    r = [0] * (len(p) + len(q) - 1)
+    for j, b in enumerate(q):
+        for i, a in enumerate(p):
+            r[i + j] ^= _mul(a, b)
+    return r
+
+
+def _poly_eval(p: list, x: int) -> int:
+    y = p[0]
+    for c in p[1:]:
+        y = _mul(y, x) ^ c
+    return y
+
+
+def _poly_mod(dividend: list, divisor: list) -> list:
+    out = list(dividend)
+    for i in range(len(dividend) - len(divisor) + 1):
+        coef = out[i]
+        if coef:
+            for j in range(1, len(divisor)):
+                out[i + j] ^= _mul(divisor[j], coef)
+    return out[-(len(divisor) - 1):]
+
+
+@lru_cache(maxsize=None)
+def _generator(nsym: int) -> tuple:
+    g = [1]
+    for i in range(nsym):
+        g = _poly_mul(g, [1, _pow(2, i)])
+    return tuple(g)
+
+
+def _word_table(table_log: np.ndarray) -> np.ndarray:
+    """For each row j, the GF products v * table[j, :] for every byte v, packed into uint64 words.
+
+    Multiplying a batch by a constant matrix then becomes one gather and XOR of
+    a few words per input column instead of per-byte arithmetic.
+    """
+    rows, cols = table_log.shape
+    width = -(-cols // 8) * 8
+    products = np.zeros((rows, 256, width), dtype=np.uint8)
+    products[:, :, :cols] = GF_EXP[GF_LOG[:, None] + table_log[:, None, :]]
+    return products.view(np.uint64)
+
+
+@lru_cache(maxsize=None)
+def _parity_table(nsym: int) -> np.ndarray:
+    # Encoding is linear: row j holds the parity of a block whose only non-zero
+    # data byte is a 1 at position j, i.e. x^(254 - j) mod g(x), built up one power of x at a time
+    k = data_size(nsym)
+    generator = _generator(nsym)
+    remainder = [1] + [0] * (nsym - 1)  # x^(nsym - 1)
+    rows = []
+    for _ in range(k):
+        top = remainder[0]
+        remainder = remainder[1:] + [0]
+        if top:
+            remainder = [r ^ _mul(top, g) for r, g in zip(remainder, generator[1:])]
+        rows.append(remainder)
+    return _word_table(GF_LOG[np.array(rows[::-1], dtype=np.uint8)])
+
+
+@lru_cache(maxsize=None)
+def _syndrome_table(nsym: int) -> np.ndarray:
+    # S_i = sum over positions p of c_p * alpha^(i * (254 - p))
+    powers = np.outer(BLOCK_SIZE - 1 - np.arange(BLOCK_SIZE), np.arange(nsym)) % 255
+    return _word_table(powers.astype(np.int16))
+
+
+def _products_xor(values: np.ndarray, table: np.ndarray, width: int) -> np.ndarray:
+    """XOR over j of values[:, j] * M[j, :] in GF(256), M given as a word table."""
+    columns = np.ascontiguousarray(values.T)
+    out = np.zeros((len(values), table.shape[2]), dtype=np.uint64)
+    for j, column in enumerate(columns):
+        out ^= table[j].take(column, axis=0)
+    return out.view(np.uint8)[:, :width]
+
+
+def encode_blocks(data: np.ndarray, nsym: int) -> np.ndarray:
+    """Appends nsym parity bytes to each row of a (blocks, 255 - nsym) uint8 array."""
+    data = np.asarray(data, dtype=np.uint8).reshape(-1, data_size(nsym))
+    return np.concatenate([data, _products_xor(data, _parity_table(nsym), nsym)], axis=1)
+
+
+def syndromes(codewords: np.ndarray, nsym: int) -> np.ndarray:
+    """Returns the (blocks, nsym) syndromes; a block is intact iff its row is all zero."""
+    check_symbols(nsym)
+    codewords = np.asarray(codewords, dtype=np.uint8).reshape(-1, BLOCK_SIZE)
+    return _products_xor(codewords, _syndrome_table(nsym), nsym)
+
+
+def _correct_block(block: list, synd: list, nsym: int) -> bool:
+    """Corrects one block in place (Berlekamp-Massey, Chien search, Forney); False if it cannot."""
+    # Berlekamp-Massey: error locator polynomial from the syndromes
+    synd = [0] + synd
+    err_loc, old_loc = [1], [1]
+    for i in range(nsym):
+        delta = synd[i + 1]
+        for j in range(1, len(err_loc)):
+            delta ^= _mul(err_loc[-(j + 1)], synd[i + 1 - j])
+        old_loc = old_loc + [0]
+        if delta:
+            if len(old_loc) > len(err_loc):
+                new_loc = _poly_scale(old_loc, delta)
+                old_loc = _poly_scale(err_loc, _inverse(delta))
+                err_loc = new_loc
+            err_loc = _poly_add(err_loc, _poly_scale(old_loc, delta))
+    while err_loc and err_loc[0] == 0:
+        del err_loc[0]
+    errors = len(err_loc) - 1
+    if errors * 2 > nsym:
+        return False
+
+    # Chien search: the locator's roots give the error positions, all 255 tried at once
+    degrees = np.arange(errors + 1)[:, None]
+    values = np.bitwise_xor.reduce(
+        GF_EXP[GF_LOG[np.array(err_loc, dtype=np.uint8)][:, None] + degrees * np.arange(BLOCK_SIZE) % 255], axis=0)
+    positions = (BLOCK_SIZE - 1 - np.flatnonzero(values == 0)).tolist()
+    if len(positions) != errors:
+        return False
+
+    # Forney: error magnitudes from the evaluator polynomial
+    coef_pos = [BLOCK_SIZE - 1 - p for p in positions]
+    locator = [1]
+    for c in coef_pos:
+        locator = _poly_mul(locator, _poly_add([1], [_pow(2, c), 0]))
+    product = _poly_mul(synd[::-1], locator)
+    evaluator = _poly_mod(product, [1] + [0] * (len(locator)))[::-1]
+    xs = [_pow(2, c) for c in coef_pos]
+    for i, x in enumerate(xs):
+        x_inv = _inverse(x)
+        denominator = 1
+        for j, other in enumerate(xs):
+            if j != i:
+                denominator = _mul(denominator, 1 ^ _mul(x_inv, other))
+        if denominator == 0:
+            return False
+        y = _mul(x, _poly_eval(evaluator[::-1], x_inv))
+        block[positions[i]] ^= _div(y, denominator)
+    return True
+
+
+def decode_blocks(codewords: np.ndarray, nsym: int):
+    """Corrects a (blocks, 255) uint8 array of codewords.
+
+    Syndromes are computed for all blocks at once; only blocks with errors go
+    through the scalar decoder. Returns (data, corrected, failed): the
+    (blocks, 255 - nsym) data bytes, the number of bytes fixed and a boolean
+    mask of blocks with more errors than nsym parity bytes can correct.
+    """
+    k = data_size(nsym)
+    codewords = np.array(codewords, dtype=np.uint8).reshape(-1, BLOCK_SIZE)
+    failed = np.zeros(len(codewords), dtype=bool)
+    corrected = 0
+    synd = syndromes(codewords, nsym)
+    for index in np.flatnonzero(synd.any(axis=1)):
+        block = codewords[index].tolist()
+        if _correct_block(block, synd[index].tolist(), nsym):
+            fixed = np.array(block, dtype=np.uint8)
+            if not syndromes(fixed, nsym).any():
+                corrected += int(np.count_nonzero(fixed != codewords[index]))
+                codewords[index] = fixed
+                continue
+        failed[index] = True
+    return codewords[:, :k], corrected, failed
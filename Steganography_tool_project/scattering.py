@@ -0,0 +1,80 @@
+import hashlib
+import numpy as np
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+class FeistelPermutation:
+    """Keyed bijection on range(domain_size), evaluated only at the indices asked for.
+
+    A balanced Feistel network permutes the smallest even-bit-width domain that
+    covers domain_size; values that land outside the carrier are walked through
+    the network again until they fall inside (cycle walking). Since the covering
+    domain is at most 4x larger, this takes a handful of rounds on average and
+    never needs an O(N) permutation table.
+    """
+
+    def __init__(self, key: str, domain_size: int, rounds: int = 6):
+        if domain_size < 1:
+            raise ValueError("Domain size must be positive")
+        self.domain_size = int(domain_size)
+        half_bits = max((int(domain_size - 1).bit_length() + 1) // 2, 1)
+        self._half_bits = np.uint64(half_bits)
+        self._half_mask = np.uint64((1 << half_bits) - 1)
+        digest = hashlib.sha512(f"stego-scatter:{key}".encode()).digest()
+        self._round_keys = [np.uint64(int.from_bytes(digest[i * 8:i * 8 + 8], 'big'))
+                            for i in range(rounds)]
+
+    def _round(self, value: np.ndarray, round_key: np.uint64) -> np.ndarray:
+        # splitmix64 finaliser: cheap, well-mixed, fully vectorised
+        z = (value ^ round_key) & _MASK64
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+        return z & self._half_mask
+
+    def _encrypt(self, values: np.ndarray) -> np.ndarray:
+        left = values >> self._half_bits
+        right = values & self._half_mask
+        for round_key in self._round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << self._half_bits) | right
+
+    def permute(self, indices) -> np.ndarray:
+        """Maps each index in [0, domain_size) to its scattered position."""
+        with np.errstate(over='ignore'):
+            values = self._encrypt(np.asarray(indices, dtype=np.uint64))
+            outside = values >= self.domain_size
+            while outside.any():
+                values[outside] = self._encrypt(values[outside])
+                outside = values >= self.domain_size
+        return values.astype(np.int64)
+
+
+def carrier_positions(start: int, count: int, domain_size: int, scatter_key: str = None) -> np.ndarray:
+    """Returns the carrier element positions for payload bits start..start+count-1.
+
+    Without a scatter key the payload is laid out sequentially from the first
+    element, exactly as the engines have always done.
+    """
+    if start + count > domain_size:
+        raise ValueError(f"Message too large ({start + count}/{domain_size} bits)")
+    indices = np.arange(start, start + count, dtype=np.int64)
+    if not scatter_key:
+        return indices
+    return FeistelPermutation(scatter_key, domain_size).permute(indices)
+
+
+def text_to_bits(message: str) -> np.ndarray:
+    """Converts a message to a 0/1 uint8 array, 8 bits per character (latin-1)."""
+    try:
+        data = message.encode('latin-1')
+    except UnicodeEncodeError:
+        raise ValueError("Message contains characters outside the 8-bit range; use a key to encrypt it")
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def bits_to_text(bits: np.ndarray) -> str:
+    """Inverse of text_to_bits; trailing bits that do not fill a byte are dropped."""
+    bits = bits[:len(bits) - len(bits) % 8]
+    return np.packbits(bits).tobytes().decode('latin-1')
@@ -0,0 +1,144 @@
+import os
+import hmac
+import base64
+import struct
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from video_steganography import VideoSteganography
+from media_types import get_engine
+
+SHARD_PREFIX = "STGSHARD1:"
+# payload id (16 bytes) + shard index (2) + shard count (2)
+SHARD_HEADER = struct.Struct('>16sHH')
+MAC_SIZE = 32
+
+
+def _mac_key(key: str = None) -> bytes:
+    return hashlib.sha256(b"stego-shard:" + (key or "").encode()).digest()
+
+
+def _carrier_capacity(carrier_path: str) -> int:
+    if not os.path.exists(carrier_path):
+        raise FileNotFoundError(f"Error: Carrier file does not exist: {carrier_path}")
+    return get_engine(carrier_path).capacity(carrier_path)
+
+
+def _encode_shard(carrier_path: str, shard: str, output_path: str) -> str:
+    engine = get_engine(carrier_path)
+    engine.encode(carrier_path, shard, output_path)
+    if engine is VideoSteganography:
+        return os.path.splitext(output_path)[0] + '.avi'
+    return output_path
+
+
+def _decode_shard(carrier_path: str):
+    try:
+        return get_engine(carrier_path).decode(carrier_path)
+    except Exception:
+        return None
+
+
+class ShardedSteganography:
+    @staticmethod
+    def _shard_capacity(carrier_capacity: int) -> int:
+        # Largest data size whose base64-encoded shard still fits the carrier
+        blocks = (carrier_capacity - len(SHARD_PREFIX)) // 4
+        return max(blocks * 3 - SHARD_HEADER.size - MAC_SIZE, 0)
+
+    @staticmethod
+    def pack_shard(payload_id: bytes, index: int, total: int, data: bytes, key: str = None) -> str:
+        body = SHARD_HEADER.pack(payload_id, index, total) + data
+        mac = hmac.new(_mac_key(key), body, hashlib.sha256).digest()
+        return SHARD_PREFIX + base64.b64encode(body + mac).decode()
+
+    @staticmethod
+    def unpack_shard(shard: str, key: str = None):
+        """Returns (payload_id, index, total, data) or None if shard is not a valid shard."""
+        # Carriers holding a binary payload decode to bytes and are never shards
+        if not isinstance(shard, str) or not shard.startswith(SHARD_PREFIX):
+            return None
+        try:
+            raw = base64.b64decode(shard[len(SHARD_PREFIX):], validate=True)
+        except ValueError:
+            return None
+        if len(raw) < SHARD_HEADER.size + MAC_SIZE:
+            return None
+        body, mac = raw[:-MAC_SIZE], raw[-MAC_SIZE:]
+        if not hmac.compare_digest(mac, hmac.new(_mac_key(key), body, hashlib.sha256).digest()):
+            return None
+        payload_id, index, total = SHARD_HEADER.unpack(body[:SHARD_HEADER.size])
+        if index >= total:
+            return None
+        return payload_id, index, total, body[SHARD_HEADER.size:]
+
+    @staticmethod
+    def split(message: str, capacities: list, key: str = None) -> list:
+        """Splits a message into authenticated shards sized in proportion to the carrier capacities."""
+        data = message.encode('utf-8')
+        if key:
+            # Raw ciphertext; the shards add the only base64 layer
+            data = VideoSteganography.encrypt_bytes(key, data)
+        limits = [ShardedSteganography._shard_capacity(c) for c in capacities]
+        total_limit = sum(limits)
+        if len(data) > total_limit:
+            raise ValueError(f"Message too large for the carriers ({len(data)}/{total_limit} bytes)")
+        if len(capacities) > 0xFFFF:
+            raise ValueError("Too many carriers")
+
+        sizes = [len(data) * limit // total_limit if total_limit else 0 for limit in limits]
+        remaining = len(data) - sum(sizes)
+        for i, limit in enumerate(limits):
+            extra = min(remaining, limit - sizes[i])
+            sizes[i] += extra
+            remaining -= extra
+
+        payload_id = os.urandom(16)
+        shards, offset = [], 0
+        for index, size in enumerate(sizes):
+            chunk = data[offset:offset + size]
+            offset += size
+            shards.append(ShardedSteganography.pack_shard(payload_id, index, len(sizes), chunk, key))
+        return shards
+
+    @staticmethod
+    def join(shards: list, key: str = None) -> str:
+        """Rebuilds a message from any complete set of shards; unrelated or forged shards are ignored."""
+        payloads = {}
+        for shard in shards:
+            parsed = ShardedSteganography.unpack_shard(shard, key)
+            if parsed is None:
+                continue
+            payload_id, index, total, data = parsed
+            payloads.setdefault((payload_id, total), {})[index] = data
+
+        for (payload_id, total), parts in payloads.items():
+            if len(parts) == total:
+                data = b''.join(parts[i] for i in range(total))
+                if key:
+                    data = VideoSteganography.decrypt_bytes(key, data)
+                return data.decode('utf-8')
+        raise ValueError("No complete set of shards found")
+
+    @staticmethod
+    def encode(carrier_paths: list, message: str, output_paths: list, key: str = None,
+               workers: int = None) -> list:
+        """Spreads a message over several image, audio or video carriers in parallel.
+
+        Returns the written output paths (video outputs always end in .avi).
+        """
+        if len(carrier_paths) != len(output_paths):
+            raise ValueError("Each carrier needs exactly one output path")
+        if not carrier_paths:
+            raise ValueError("At least one carrier is required")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            capacities = list(pool.map(_carrier_capacity, carrier_paths))
+            shards = ShardedSteganography.split(message, capacities, key)
+            return list(pool.map(_encode_shard, carrier_paths, shards, output_paths))
+
+    @staticmethod
+    def decode(carrier_paths: list, key: str = None, workers: int = None) -> str:
+        """Decodes the carriers in parallel and rebuilds the message from a complete shard set."""
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_decode_shard, carrier_paths))
+        return ShardedSteganography.join(shards, key)
@@ -1,9 +1,101 @@
 import os
+import sys
+import json
+import time
+import base64
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from image_steganography import ImageSteganography
 from audio_steganography import AudioSteganography
 from video_steganography import VideoSteganography
+from prepared_payload import PreparedPayload
+from payload_stream import write_text
+from media_types import media_type
+
+# Exit codes of the scripted subcommands
+EXIT_OK = 0
+EXIT_ERROR = 1      # the operation failed: no payload, wrong key, message too large, ...
+EXIT_USAGE = 2      # bad arguments (argparse's own code)
+EXIT_NOT_FOUND = 3  # an input file is missing or unreadable
+EXIT_PARTIAL = 4    # several jobs were run and some of them failed
+
+OPERATIONS = ('encode', 'decode', 'capacity')
+# Encode options only some media types take
+MEDIA_OPTIONS = {'codec': ('video',), 'profile': ('video',)}
+
+class UsageError(ValueError):
+    """A job's options do not fit its carrier; reported with EXIT_USAGE."""
+
+# Engines used by the menu handlers; swapped for a daemon client with --daemon
+engines = {
+    'image': ImageSteganography,
+    'audio': AudioSteganography,
+    'video': VideoSteganography,
+}
+
+def use_daemon(url: str) -> None:
+    from steganography_daemon import StegoDaemonClient
+    client = StegoDaemonClient(url)
+    for media in engines:
+        engines[media] = client
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Steganography tool")
+    parser.add_argument('--daemon', metavar='URL',
+                        help="send jobs to a running steganography_daemon "
+                             "(e.g. http://127.0.0.1:8765 or unix:/path/to.sock)")
+    subparsers = parser.add_subparsers(dest='command')
+    scan_parser = subparsers.add_parser('scan', help="find files that carry a payload (JSONL output)")
+    scan_parser.add_argument('paths', nargs='+', help="files or directories to scan")
+    scan_parser.add_argument('--workers', type=int, default=None)
+    scan_parser.add_argument('--chi-square', action='store_true',
+                             help="also run a chi-square LSB test to flag carriers from other tools")
+    scan_parser.add_argument('--output', help="write JSONL here instead of stdout")
+
+    encode_parser = subparsers.add_parser('encode', help="hide a payload in a carrier (JSON result on stdout)")
+    encode_parser.add_argument('input', help="carrier image, audio or video")
+    encode_parser.add_argument('output', help="where to write the encoded carrier")
+    source = encode_parser.add_mutually_exclusive_group()
+    source.add_argument('--message', help="text message")
+    source.add_argument('--message-file', metavar='PATH', help="read a UTF-8 text message from a file")
+    source.add_argument('--payload', metavar='PATH',
+                        help="stream a binary payload from a file, or '-' for stdin (the default)")
+    encode_parser.add_argument('--ecc', type=int, help="Reed-Solomon parity bytes per 255-byte block")
+    encode_parser.add_argument('--codec', help="lossless video codec")
+    encode_parser.add_argument('--profile', help="video codec profile")
+
+    decode_parser = subparsers.add_parser('decode', help="extract a payload (data on stdout, JSON result on stderr)")
+    decode_parser.add_argument('input', help="encoded image, audio or video")
+    decode_parser.add_argument('--output', default='-',
+                               help="write the payload here instead of stdout (the JSON result then goes to stdout)")
+
+    capacity_parser = subparsers.add_parser('capacity', help="print how many bytes each carrier holds (JSONL)")
+    capacity_parser.add_argument('paths', nargs='+', help="carrier files")
+
+    batch_parser = subparsers.add_parser('batch', help="run JSONL jobs in parallel (JSONL results)")
+    batch_parser.add_argument('jobs', nargs='?', default='-',
+                              help="JSONL file of independent jobs (run in parallel, in no set order), "
+                                   "or '-' for stdin; see run_job() for the fields")
+    batch_parser.add_argument('--workers', type=int, default=None)
+    batch_parser.add_argument('--output', help="write JSONL here instead of stdout")
+
+    for sub in (encode_parser, decode_parser):
+        sub.add_argument('--key', help="encryption key")
+        sub.add_argument('--scatter-key', help="key for pseudo-random bit placement")
+        sub.add_argument('--matrix-k', type=int, help="Hamming matrix embedding parameter")
+    args = parser.parse_args(argv)
+
+    if args.command == 'scan':
+        handle_scan(args)
+        return
+    if args.daemon:
+        use_daemon(args.daemon)
+    if args.command:
+        handler = {'encode': handle_encode, 'decode': handle_decode,
+                   'capacity': handle_capacity, 'batch': handle_batch}[args.command]
+        return handler(args)
 
-def main():
     while True:
         print("\n Choose the option of your Steganography:")
         print("1. If you want Image Steganography")
@@ -43,13 +135,13 @@ def handle_image_stego():
             print("Error: AES key must be 16, 24, or 32 characters long.")
             key = input("Enter a valid encryption key: ")'''
 
-        ImageSteganography.encode(input_file, message, output_file, key)
+        engines['image'].encode(input_file, message, output_file, key)
         print(f"Message encoded successfully in {output_file}")
     
     elif action == '2':
         input_file = input("Enter input image file path: ")
         key = input("Enter decryption key (optional): ")
-        decoded_message = ImageSteganography.decode(input_file, key)
+        decoded_message = engines['image'].decode(input_file, key)
         print(f"Decoded message: {decoded_message}")
 
 def handle_audio_stego():
@@ -63,13 +155,13 @@ def handle_audio_stego():
         output_file = input("Enter output audio file path: ")
         message = input("Enter the message to encode: ")
         key = input("Enter encryption key (optional): ")
-        AudioSteganography.encode(input_file, message, output_file, key)
+        engines['audio'].encode(input_file, message, output_file, key)
         print(f"Message encoded successfully in {output_file}")
 
     elif action == '2':
         input_file = input("Enter input audio file path: ")
         key = input("Enter decryption key (optional): ")
-        decoded_message = AudioSteganography.decode(input_file, key)
+        decoded_message = engines['audio'].decode(input_file, key)
         print(f"Decoded message: {decoded_message}")
 
 def handle_video_stego():
@@ -83,13 +175,13 @@ def handle_video_stego():
         output_file = input("Enter output video file path: ")
         message = input("Enter the message to encode: ")
         key = input("Enter encryption key (optional): ")
-        VideoSteganography.encode(input_file, message, output_file, key)
+        engines['video'].encode(input_file, message, output_file, key)
         print(f"Message encoded successfully in {output_file}")
 
     elif action == '2':
         input_file = input("Enter input video file path: ")
         key = input("Enter decryption key (optional): ")
-        decoded_message = VideoSteganography.decode(input_file, key)
+        decoded_message = engines['video'].decode(input_file, key)
         print(f"Decoded message: {decoded_message}")
 
 def handle_batch_processing():
@@ -103,14 +195,17 @@ def handle_batch_processing():
         output_files = input("Enter output file paths (comma-separated): ").split(',')
         message = input("Enter the message to encode: ")
         key = input("Enter encryption key (optional): ")
+        # Encrypt and frame once for every carrier (a daemon only takes plain messages)
+        if engines['image'] is ImageSteganography:
+            message, key = PreparedPayload(message, key), None
 
         for input_file, output_file in zip(input_files, output_files):
             if input_file.endswith(('.png', '.bmp', '.jpg', '.jpeg')):
-                ImageSteganography.encode(input_file, message, output_file, key)
+                engines['image'].encode(input_file, message, output_file, key)
             elif input_file.endswith(('.wav', '.mp3')):
-                AudioSteganography.encode(input_file, message, output_file, key)
+                engines['audio'].encode(input_file, message, output_file, key)
             elif input_file.endswith(('.avi', '.mp4')):
-                VideoSteganography.encode(input_file, message, output_file, key)
+                engines['video'].encode(input_file, message, output_file, key)
             print(f"Message encoded successfully in {output_file}")
 
     elif action == '2':
@@ -119,12 +214,236 @@ def handle_batch_processing():
 
         for input_file in input_files:
             if input_file.endswith(('.png', '.bmp', '.jpg', '.jpeg')):
-                decoded_message = ImageSteganography.decode(input_file, key)
+                decoded_message = engines['image'].decode(input_file, key)
             elif input_file.endswith(('.wav', '.mp3')):
-                decoded_message = AudioSteganography.decode(input_file, key)
+                decoded_message = engines['audio'].decode(input_file, key)
             elif input_file.endswith(('.avi', '.mp4')):
-                decoded_message = VideoSteganography.decode(input_file, key)
+                decoded_message = engines['video'].decode(input_file, key)
             print(f"Decoded message from {input_file}: {decoded_message}")
 
+def handle_scan(args):
+    from steganography_scanner import scan, write_jsonl
+    results = scan(args.paths, args.workers, args.chi_square)
+    if args.output:
+        with open(args.output, 'w') as f:
+            found = write_jsonl(results, f)
+    else:
+        found = write_jsonl(results)
+    print(f"{found} file(s) with a payload", file=sys.stderr)
+
+def _options(args, names: tuple) -> dict:
+    return {name: getattr(args, name) for name in names if getattr(args, name, None) is not None}
+
+def _elapsed(start: float) -> float:
+    return round(time.perf_counter() - start, 6)
+
+def _open_payload(job: dict):
+    """Returns the message for an encode job: a str, or an open binary file to stream from."""
+    if job.get('message') is not None:
+        return job['message']
+    if job.get('message_file'):
+        with open(job['message_file'], encoding='utf-8') as f:
+            return f.read()
+    path = job.get('payload')
+    if not path:
+        raise ValueError("Encode job needs a message, message_file or payload")
+    return sys.stdin.buffer if path == '-' else open(path, 'rb')
+
+def run_job(job: dict, sink=None) -> dict:
+    """Runs one job and returns its JSON-ready result, with per-stage timings in seconds.
+
+    job uses the daemon's fields (op, path, output, message, key, options) plus:
+    message_file (text message from a file), payload (binary payload file, '-'
+    for stdin) and decoded (file for a decoded payload). Without decoded or a
+    sink, a binary payload is returned base64-encoded. Failures are reported
+    in the result with an exit_code instead of being raised.
+    """
+    started = time.perf_counter()
+    result = {'op': job.get('op'), 'path': job.get('path'), 'ok': False}
+    timings = {}
+    try:
+        if result['op'] not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {result['op']}")
+        if not os.path.exists(job['path']):
+            raise FileNotFoundError(f"Input file does not exist: {job['path']}")
+        kind = media_type(job['path'])
+        engine = engines[kind]
+        local = isinstance(engine, type)
+        options = job.get('options') or {}
+        for name, kinds in MEDIA_OPTIONS.items():
+            if name in options and kind not in kinds:
+                raise UsageError(f"The {name} option only applies to {'/'.join(kinds)} carriers, not {kind}")
+        key = job.get('key')
+        # Engines report progress with print(); keep stdout clean for data and JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            if result['op'] == 'encode':
+                stage = time.perf_counter()
+                message = _open_payload(job)
+                timings['read'] = _elapsed(stage)
+                if not local and not isinstance(message, str):
+                    raise ValueError("Binary payloads cannot be sent to the daemon")
+                stage = time.perf_counter()
+                try:
+                    engine.encode(job['path'], message, job['output'], key, **options)
+                finally:
+                    if not isinstance(message, str) and message is not sys.stdin.buffer:
+                        message.close()
+                timings['encode'] = _elapsed(stage)
+                result['output'] = job['output']
+            elif result['op'] == 'decode':
+                stage = time.perf_counter()
+                target = sink if sink is not None else (open(job['decoded'], 'wb') if job.get('decoded') else None)
+                try:
+                    if target is not None and local:
+                        result['bytes'] = engine.decode(job['path'], key, sink=target, **options)
+                    else:
+                        decoded = engine.decode(job['path'], key, **options)
+                        if target is not None:
+                            result['bytes'] = write_text(target, decoded) if isinstance(decoded, str) else target.write(decoded)
+                        elif isinstance(decoded, bytes):
+                            result['result_base64'] = base64.b64encode(decoded).decode()
+                        else:
+                            result['result'] = decoded
+                finally:
+                    if target is not None and target is not sink:
+                        target.close()
+                timings['decode'] = _elapsed(stage)
+            else:
+                stage = time.perf_counter()
+                result['capacity'] = engine.capacity(job['path'])
+                timings['capacity'] = _elapsed(stage)
+        result['ok'] = True
+    except OSError as e:
+        result.update(error=str(e), exit_code=EXIT_NOT_FOUND)
+    except UsageError as e:
+        result.update(error=str(e), exit_code=EXIT_USAGE)
+    except Exception as e:
+        result.update(error=str(e), exit_code=EXIT_ERROR)
+    timings['total'] = _elapsed(started)
+    result['timings'] = timings
+    return result
+
+def _exit_code(results: list) -> int:
+    failed = [r for r in results if not r['ok']]
+    if not failed:
+        return EXIT_OK
+    return failed[0]['exit_code'] if len(results) == 1 else EXIT_PARTIAL
+
+def _write_result(result: dict, stream) -> None:
+    stream.write(json.dumps(result) + '\n')
+    stream.flush()
+
+def handle_encode(args) -> int:
+    job = {'op': 'encode', 'path': args.input, 'output': args.output, 'key': args.key,
+           'message': args.message, 'message_file': args.message_file, 'payload': args.payload or '-',
+           'options': _options(args, ('scatter_key', 'matrix_k', 'ecc', 'codec', 'profile'))}
+    result = run_job(job)
+    _write_result(result, sys.stdout)
+    return _exit_code([result])
+
+def handle_decode(args) -> int:
+    job = {'op': 'decode', 'path': args.input, 'key': args.key,
+           'options': _options(args, ('scatter_key', 'matrix_k'))}
+    if args.output == '-':
+        result = run_job(job, sink=sys.stdout.buffer)
+        sys.stdout.flush()
+        _write_result(result, sys.stderr)
+    else:
+        job['decoded'] = args.output
+        result = run_job(job)
+        _write_result(result, sys.stdout)
+    return _exit_code([result])
+
+def handle_capacity(args) -> int:
+    results = []
+    for path in args.paths:
+        results.append(run_job({'op': 'capacity', 'path': path}))
+        _write_result(results[-1], sys.stdout)
+    return _exit_code(results)
+
+def _read_jobs(stream):
+    for index, line in enumerate(stream):
+        if line.strip():
+            job = json.loads(line)
+            job.setdefault('index', index)
+            yield job
+
+def _run_indexed(job: dict) -> dict:
+    return dict(run_job(job), index=job['index'])
+
+def _daemon_job(job: dict) -> dict:
+    """Returns job as the daemon takes it, with message_file read locally."""
+    if job.get('payload'):
+        raise ValueError("Binary payloads cannot be sent to the daemon")
+    if job.get('op') == 'encode' and job.get('message') is None:
+        job = dict(job, message=_open_payload(job))
+    return {field: job[field] for field in ('op', 'path', 'output', 'message', 'key', 'options') if field in job}
+
+def _daemon_batch(jobs: list, client):
+    """Yields job results from the daemon; decoded files are written locally."""
+    results, sendable = {}, []
+    for job in jobs:
+        try:
+            sendable.append((job, _daemon_job(job)))
+        except Exception as e:
+            results[job['index']] = {'ok': False, 'error': str(e),
+                                     'exit_code': EXIT_NOT_FOUND if isinstance(e, OSError) else EXIT_ERROR}
+    replies = client.batch([sent for _, sent in sendable]) if sendable else []
+    for (job, _), reply in zip(sendable, replies):
+        reply = dict(reply)
+        if reply['ok'] and job.get('decoded'):
+            try:
+                with open(job['decoded'], 'wb') as target:
+                    if 'result_base64' in reply:
+                        reply['bytes'] = target.write(base64.b64decode(reply.pop('result_base64')))
+                    else:
+                        reply['bytes'] = write_text(target, reply.pop('result'))
+            except OSError as e:
+                reply = {'ok': False, 'error': str(e), 'exit_code': EXIT_NOT_FOUND}
+        if not reply['ok']:
+            reply.setdefault('exit_code', EXIT_ERROR)
+        results[job['index']] = reply
+    for job in jobs:
+        # The daemon's replies carry its own per-job timings
+        yield dict({'index': job['index'], 'op': job.get('op'), 'path': job.get('path')}, **results[job['index']])
+
+def _run_batch(jobs, workers: int):
+    """Yields job results as they complete, keeping only a few jobs per worker in flight."""
+    if workers == 1:
+        yield from map(_run_indexed, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(_run_indexed, job))
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+def handle_batch(args) -> int:
+    source = sys.stdin if args.jobs == '-' else open(args.jobs)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    results = []
+    try:
+        jobs = _read_jobs(source)
+        if args.daemon:
+            # The daemon batches jobs into its warm workers itself
+            completed = _daemon_batch(list(jobs), engines['image'])
+        else:
+            completed = _run_batch(jobs, args.workers or os.cpu_count() or 1)
+        for result in completed:
+            results.append(result)
+            _write_result(result, output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"{sum(r['ok'] for r in results)}/{len(results)} job(s) succeeded", file=sys.stderr)
+    return _exit_code(results)
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
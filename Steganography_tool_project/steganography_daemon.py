@@ -0,0 +1,345 @@
+import os
+import json
+import base64
+import queue
+import socket
+import argparse
+import ipaddress
+import threading
+import time
+import http.client
+import socketserver
+import urllib.request
+import urllib.error
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+OPERATIONS = ('encode', 'decode', 'capacity')
+UNIX_PREFIX = 'unix:'
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a host name or Host header value (with optional port) names this machine."""
+    if host.startswith('['):
+        host = host[1:host.find(']')]
+    elif host.count(':') == 1:
+        host = host.split(':')[0]
+    if host.lower() == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # Only the daemon's user may connect; the umask closes the gap before chmod
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, 0o600)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _warm_worker():
+    # Pay the cv2/numpy/Crypto/pydub import cost once per worker process
+    import media_types  # noqa: F401
+
+
+def _run_job(job: dict) -> dict:
+    """Runs one job and returns its reply; binary payloads are sent as result_base64."""
+    result = _job_result(job)
+    if isinstance(result, bytes):
+        return {'ok': True, 'result_base64': base64.b64encode(result).decode()}
+    return {'ok': True, 'result': result}
+
+
+def _job_result(job: dict):
+    from media_types import get_engine
+    op = job.get('op')
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {op}")
+    path = job['path']
+    engine = get_engine(path)
+    options = job.get('options') or {}
+    if op == 'encode':
+        engine.encode(path, job['message'], job['output'], job.get('key'), **options)
+        return job['output']
+    if op == 'decode':
+        return engine.decode(path, job.get('key'), **options)
+    return engine.capacity(path)
+
+
+def _run_batch(jobs: list) -> list:
+    """Runs a batch of small jobs inside one worker, isolating their failures and timing each."""
+    results = []
+    for job in jobs:
+        started = time.perf_counter()
+        try:
+            result = _run_job(job)
+        except Exception as e:
+            result = {'ok': False, 'error': str(e)}
+        result['timings'] = {'total': round(time.perf_counter() - started, 6)}
+        results.append(result)
+    return results
+
+
+class StegoDaemon:
+    """Local steganography server that keeps warm worker processes.
+
+    Requests arriving within batch_window seconds of each other are grouped (up
+    to batch_size) and shipped to a worker as one task, so thousands of small
+    jobs do not each pay a process round trip. Only loopback addresses are
+    accepted for host, so it never touches the network. With socket_path it listens on a
+    Unix socket that only its own user can open instead.
+
+    Requests must be application/json, carry no Origin header and name a
+    loopback Host, so web pages and DNS-rebound names cannot drive it.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = None,
+                 batch_size: int = 16, batch_window: float = 0.005, socket_path: str = None):
+        if not socket_path and not is_loopback(host):
+            raise ValueError(f"The daemon only listens on loopback addresses, not {host}")
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        self._jobs = queue.Queue()
+        self._stopping = threading.Event()
+        self._batcher = threading.Thread(target=self._batch_loop, daemon=True)
+        self.socket_path = socket_path
+        if socket_path:
+            self._server = _UnixHTTPServer(socket_path, self._handler_class())
+        else:
+            self._server = ThreadingHTTPServer((host, port), self._handler_class())
+            self._server.daemon_threads = True
+
+    @property
+    def address(self):
+        """(host, port) of the HTTP listener, or the Unix socket path."""
+        if self.socket_path:
+            return self.socket_path
+        return self._server.server_address[:2]
+
+    def warm_up(self) -> None:
+        """Starts every worker process now instead of on the first request."""
+        for future in [self._pool.submit(_warm_worker) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, job: dict) -> Future:
+        future = Future()
+        self._jobs.put((job, future))
+        return future
+
+    def _batch_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                batch = [self._jobs.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._jobs.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list) -> None:
+        futures = [future for _, future in batch]
+
+        def done(task):
+            try:
+                results = task.result()
+            except Exception as e:
+                results = [{'ok': False, 'error': str(e)}] * len(futures)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+        self._pool.submit(_run_batch, [job for job, _ in batch]).add_done_callback(done)
+
+    def _handler_class(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/health':
+                    self._reply(200, {'ok': True})
+                else:
+                    self._reply(404, {'ok': False, 'error': 'Not found'})
+
+            def _forbidden(self) -> str:
+                if self.headers.get_content_type() != 'application/json':
+                    return 'Content-Type must be application/json'
+                if self.headers.get('Origin') is not None:
+                    return 'Cross-origin requests are not accepted'
+                if not is_loopback(self.headers.get('Host', '')):
+                    return 'Host must be a loopback name'
+                return None
+
+            def do_POST(self):
+                error = self._forbidden()
+                if error:
+                    self._reply(403, {'ok': False, 'error': error})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self._reply(400, {'ok': False, 'error': 'Invalid JSON'})
+                    return
+                if not isinstance(body, dict):
+                    self._reply(400, {'ok': False, 'error': 'Request body must be a JSON object'})
+                    return
+
+                op = self.path.strip('/')
+                if op == 'batch':
+                    jobs = body.get('jobs', [])
+                    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+                        self._reply(400, {'ok': False, 'error': 'jobs must be a list of JSON objects'})
+                        return
+                    futures = [daemon.submit(job) for job in jobs]
+                    self._reply(200, {'ok': True, 'results': [f.result() for f in futures]})
+                elif op in OPERATIONS:
+                    result = daemon.submit(dict(body, op=op)).result()
+                    self._reply(200 if result['ok'] else 422, result)
+                else:
+                    self._reply(404, {'ok': False, 'error': 'Not found'})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self) -> None:
+        self._batcher.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._stopping.set()
+            self._server.server_close()
+            self._pool.shutdown(wait=True)
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def shutdown(self) -> None:
+        self._server.shutdown()
+
+
+class StegoDaemonClient:
+    """Thin JSON client for a running StegoDaemon; url is http://host:port or unix:/path/to.sock."""
+
+    def __init__(self, url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        # unix:/path and unix:///path both name a socket file
+        path = self.url[len(UNIX_PREFIX):]
+        self._socket_path = path[2:] if path.startswith('//') else path
+        # Never route through a configured HTTP proxy; the daemon is local only
+        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    def _post(self, op: str, body: dict) -> dict:
+        if self.url.startswith(UNIX_PREFIX):
+            connection = _UnixConnection(self._socket_path, self.timeout)
+            try:
+                connection.request('POST', f"/{op}", body=json.dumps(body).encode(),
+                                   headers={'Content-Type': 'application/json'})
+                return json.loads(connection.getresponse().read() or b'{}')
+            finally:
+                connection.close()
+        request = urllib.request.Request(f"{self.url}/{op}", data=json.dumps(body).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with self._opener.open(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return json.loads(e.read() or b'{}')
+
+    def _call(self, op: str, body: dict):
+        reply = self._post(op, body)
+        if not reply.get('ok'):
+            raise ValueError(reply.get('error', 'Daemon request failed'))
+        if 'result_base64' in reply:
+            return base64.b64decode(reply['result_base64'])
+        return reply['result']
+
+    @staticmethod
+    def _absolute(job: dict) -> dict:
+        # The daemon resolves paths against its own working directory, not the caller's
+        return dict(job, **{field: os.path.abspath(job[field]) for field in ('path', 'output')
+                            if isinstance(job.get(field), str)})
+
+    def encode(self, path: str, message: str, output_path: str, key: str = None, **options) -> str:
+        return self._call('encode', self._absolute({'path': path, 'message': message, 'output': output_path,
+                                                    'key': key, 'options': options}))
+
+    def decode(self, path: str, key: str = None, **options):
+        return self._call('decode', self._absolute({'path': path, 'key': key, 'options': options}))
+
+    def capacity(self, path: str) -> int:
+        return self._call('capacity', self._absolute({'path': path}))
+
+    def batch(self, jobs: list) -> list:
+        """Sends many jobs in one request; returns one {'ok', 'result'|'result_base64'|'error'} dict per job."""
+        return self._post('batch', {'jobs': [self._absolute(job) for job in jobs]})['results']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local steganography daemon")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="loopback address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', metavar='PATH', help="listen on a Unix socket (mode 0600) instead of HTTP")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    try:
+        daemon = StegoDaemon(args.host, args.port, args.workers, args.batch_size, socket_path=args.socket)
+    except ValueError as e:
+        parser.error(str(e))
+    daemon.warm_up()
+    if args.socket:
+        print(f"Steganography daemon listening on {UNIX_PREFIX}{daemon.address}")
+    else:
+        host, port = daemon.address
+        print(f"Steganography daemon listening on http://{host}:{port}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping daemon...")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ class SteganographyGUI:
         self.setup_ui()
         self.setup_menu()
         self.current_file = None
+        self.message_file = None
         self.preview_image = None
         self.dark_mode = False
 
@@ -87,10 +88,10 @@ class SteganographyGUI:
         self.message_entry = scrolledtext.ScrolledText(msg_frame, height=4, wrap=tk.WORD)
         self.message_entry.pack(fill=tk.X, padx=5, pady=5)
         
-        '''ttk.Button(msg_frame, text="Load Message from File", 
-                  command=self.load_message_from_file).pack(side=tk.LEFT, pady=5)'''
+        ttk.Button(msg_frame, text="Load Message from File", 
+                  command=self.load_message_from_file).pack(side=tk.LEFT, pady=5)
         ttk.Button(msg_frame, text="Clear Message", 
-                  command=lambda: self.message_entry.delete(1.0, tk.END)).pack(side=tk.RIGHT, pady=5)
+                  command=self.clear_message).pack(side=tk.RIGHT, pady=5)
 
         # Action buttons
         btn_frame = ttk.Frame(main_frame)
@@ -270,20 +271,26 @@ class SteganographyGUI:
         self.audio_controls_frame.pack_forget()
 
     def load_message_from_file(self):
-        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
+        # Any file can be hidden; it is streamed into the carrier instead of loaded into the text box
+        file_path = filedialog.askopenfilename(filetypes=[("All files", "*.*"), ("Text files", "*.txt")])
         if file_path:
-            try:
-                with open(file_path, 'r') as f:
-                    self.message_entry.delete(1.0, tk.END)
-                    self.message_entry.insert(tk.END, f.read())
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load message: {str(e)}")
+            if not os.path.isfile(file_path):
+                messagebox.showerror("Error", "Failed to load message: file does not exist")
+                return
+            self.message_file = file_path
+            self.message_entry.delete(1.0, tk.END)
+            self.message_entry.insert(tk.END, f"[File payload: {os.path.basename(file_path)}]")
+            self.status_bar.config(text=f"Loaded payload file: {file_path}")
+
+    def clear_message(self):
+        self.message_file = None
+        self.message_entry.delete(1.0, tk.END)
 
     def encode(self):
         media_type = self.media_type.get()
         message = self.message_entry.get("1.0", tk.END).strip()
         
-        if not message:
+        if not message and not self.message_file:
             messagebox.showwarning("Input Error", "Please enter a message to encode!")
             return
             
@@ -299,12 +306,13 @@ class SteganographyGUI:
             if self.dark_mode:
                 key = "mysecretkey"  # Example key for encryption
 
-            if media_type == "Image":
-                ImageSteganography.encode(self.current_file, message, output_path, key)
-            elif media_type == "Audio":
-                AudioSteganography.encode(self.current_file, message, output_path, key)
-            elif media_type == "Video":
-                VideoSteganography.encode(self.current_file, message, output_path, key)
+            engine = {"Image": ImageSteganography, "Audio": AudioSteganography,
+                      "Video": VideoSteganography}[media_type]
+            if self.message_file:
+                with open(self.message_file, 'rb') as payload:
+                    engine.encode(self.current_file, payload, output_path, key)
+            else:
+                engine.encode(self.current_file, message, output_path, key)
                 
             self.status_bar.config(text=f"Encoded successfully to: {output_path}")
             messagebox.showinfo("Success", "Message encoded successfully!")
@@ -336,7 +344,16 @@ class SteganographyGUI:
             elif media_type == "Video":
                 message = VideoSteganography.decode(self.current_file, key)
 
-            if message:
+            if isinstance(message, bytes):
+                # Binary payloads are saved to a file rather than shown
+                save_path = filedialog.asksaveasfilename(title="Save extracted payload")
+                if save_path:
+                    with open(save_path, 'wb') as f:
+                        f.write(message)
+                    self.status_bar.config(text=f"Payload saved to: {save_path}")
+                else:
+                    self.status_bar.config(text="Decoded payload discarded")
+            elif message:
                 self.message_entry.delete(1.0, tk.END)
                 self.message_entry.insert(tk.END, message)
                 self.status_bar.config(text="Decoded successfully")
@@ -351,7 +368,7 @@ class SteganographyGUI:
 
     def clear_all(self):
         self.clear_preview()
-        self.message_entry.delete(1.0, tk.END)
+        self.clear_message()
         self.current_file = None
         self.status_bar.config(text="Cleared all")
 
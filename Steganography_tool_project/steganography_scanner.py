@@ -0,0 +1,202 @@
+import os
+import sys
+import math
+import json
+import wave
+import cv2
+import numpy as np
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from media_types import media_type, IMAGE_EXTENSIONS, AUDIO_EXTENSIONS, VIDEO_EXTENSIONS
+from sharded_steganography import SHARD_PREFIX
+from payload_stream import has_container_magic, PROBE_BYTES
+
+# Message bytes inspected by the header check
+HEADER_BYTES = 64
+# Carrier elements fed to the chi-square test
+CHI_SQUARE_ELEMENTS = 1 << 16
+# Shortest null-terminated text accepted as a payload
+MIN_TEXT_BYTES = 2
+# Image decoders that produce rows top to bottom, so decoding can stop after the first rows
+ROW_SEQUENTIAL_CODECS = ('raw', 'zip')
+
+
+def _is_text(data: bytes) -> bool:
+    return all(32 <= b < 127 or b in (9, 10, 13) for b in data)
+
+
+def _text_header(lsbs: np.ndarray) -> dict:
+    """Checks null-terminated framing (image and audio engines)."""
+    values = np.packbits(lsbs[:HEADER_BYTES * 8]).tobytes()
+    if has_container_magic(values):
+        return {'payload': True, 'format': 'stream'}
+    end = values.find(b'\0')
+    text = values if end < 0 else values[:end]
+    if len(text) < MIN_TEXT_BYTES or not _is_text(text):
+        return {'payload': False}
+    return {'payload': True, 'format': 'shard' if text.startswith(SHARD_PREFIX.encode()) else 'text'}
+
+
+def _length_header(lsbs: np.ndarray, capacity: int) -> dict:
+    """Checks 64-bit length-prefixed framing (video engine)."""
+    if has_container_magic(np.packbits(lsbs[:PROBE_BYTES * 8]).tobytes()):
+        return {'payload': True, 'format': 'stream'}
+    length = int.from_bytes(np.packbits(lsbs[:64]).tobytes(), 'big')
+    if length == 0 or length % 8 or 64 + length > capacity:
+        return {'payload': False}
+    prefix = np.packbits(lsbs[64:64 + min(length, HEADER_BYTES * 8)]).tobytes()
+    if not _is_text(prefix):
+        return {'payload': False}
+    return {'payload': True, 'format': 'shard' if prefix.startswith(SHARD_PREFIX.encode()) else 'length-prefixed',
+            'length': length // 8}
+
+
+def chi_square_probability(samples: np.ndarray) -> float:
+    """Pairs-of-values chi-square test; values near 1 indicate LSB replacement.
+
+    Embedding random bits evens out the counts of each value pair (2i, 2i+1),
+    which is what a low chi-square statistic measures.
+    """
+    histogram = np.bincount(samples.reshape(-1), minlength=256).astype(np.float64)
+    even, odd = histogram[0::2], histogram[1::2]
+    expected = (even + odd) / 2
+    used = expected > 0
+    dof = int(np.count_nonzero(used)) - 1
+    if dof < 1:
+        return 0.0
+    statistic = float(np.sum((even[used] - expected[used]) ** 2 / expected[used]))
+    # Wilson-Hilferty approximation of the chi-square CDF
+    z = ((statistic / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 1 - 0.5 * (1 + math.erf(z / math.sqrt(2)))
+
+
+def _scan_elements(chi_square: bool) -> int:
+    return max(HEADER_BYTES * 8, CHI_SQUARE_ELEMENTS) if chi_square else HEADER_BYTES * 8
+
+
+def _first_rows(img: Image.Image, rows: int) -> np.ndarray:
+    """Decodes only the first rows of an image where its decoder allows, else the whole image."""
+    width, height = img.size
+    tiles = []
+    for codec, (x0, y0, x1, y1), offset, args in img.tile:
+        if codec not in ROW_SEQUENTIAL_CODECS or img.info.get('interlace'):
+            tiles = None
+            break
+        if y0 >= rows:
+            continue
+        if y1 > rows and codec == 'raw' and isinstance(args, tuple) and len(args) > 2 and args[2] < 0:
+            # Bottom-up rows (BMP): the first image rows are at the end of the tile
+            if args[1] <= 0:
+                tiles = None
+                break
+            offset += (y1 - rows) * args[1]
+        tiles.append((codec, (x0, y0, x1, min(y1, rows)), offset, args))
+    if tiles and rows < height:
+        img.tile = tiles
+        img._size = (width, rows)
+    return np.asarray(img)[:rows]
+
+
+def _scan_image(path: str, chi_square: bool = False):
+    img = Image.open(path)
+    width, height = img.size
+    rows = min(height, -(-_scan_elements(chi_square) // (3 * width)))
+    pixels = _first_rows(img, rows)
+    if pixels.ndim != 3 or pixels.shape[2] < 3:
+        return None, None, None
+    pixels = pixels[..., :3].reshape(-1)
+    return pixels, _text_header(pixels & 1), width * height * 3
+
+
+def _scan_audio(path: str, chi_square: bool = False):
+    with wave.open(path, 'rb') as audio:
+        frame_bytes = audio.getsampwidth() * audio.getnchannels()
+        samples = np.frombuffer(audio.readframes(-(-_scan_elements(chi_square) // frame_bytes)), dtype=np.uint8)
+        capacity = audio.getnframes() * frame_bytes
+    return samples, _text_header(samples & 1), capacity
+
+
+def _scan_video(path: str, chi_square: bool = False):
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise ValueError("Could not open video file")
+        capacity = (int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) * int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                    * int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) * 3)
+        ret, frame = cap.read()
+    finally:
+        cap.release()
+    if not ret:
+        return None, None, capacity
+    samples = frame.reshape(-1)
+    return samples, _length_header(samples & 1, capacity), capacity
+
+
+def scan_file(path: str, chi_square: bool = False) -> dict:
+    """Checks whether a file carries a payload by reading only its first pixels, samples or frame.
+
+    Payloads written with a scatter_key or matrix_k cannot be recognised without
+    those parameters and are reported as absent.
+    """
+    result = {'path': path, 'payload': False}
+    try:
+        kind = media_type(path)
+        result['media'] = kind
+        if kind == 'audio' and path.lower().endswith('.mp3'):
+            raise ValueError("MP3 files are not scanned; they must be converted to WAV first")
+        scanner = {'image': _scan_image, 'audio': _scan_audio, 'video': _scan_video}[kind]
+        samples, header, capacity = scanner(path, chi_square)
+        if header is None:
+            raise ValueError("Unsupported carrier format")
+        result.update(header)
+        result['capacity_bits'] = capacity
+        if chi_square:
+            result['chi_square'] = round(chi_square_probability(samples[:CHI_SQUARE_ELEMENTS]), 6)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def iter_media_files(paths: list):
+    """Yields supported media files from files and (recursively walked) directories."""
+    extensions = IMAGE_EXTENSIONS + AUDIO_EXTENSIONS + VIDEO_EXTENSIONS
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(extensions):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def scan(paths: list, workers: int = None, chi_square: bool = False):
+    """Scans files and directories in a process pool, yielding results as they complete.
+
+    At most a few tasks per worker are in flight, so arbitrarily large libraries
+    are streamed rather than queued up front.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = workers * 4
+        pending = set()
+        for path in iter_media_files(paths):
+            pending.add(pool.submit(scan_file, path, chi_square))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def write_jsonl(results, stream=None) -> int:
+    """Writes one JSON object per line; returns how many files carry a payload."""
+    stream = stream or sys.stdout
+    found = 0
+    for result in results:
+        found += result['payload']
+        stream.write(json.dumps(result) + '\n')
+        stream.flush()
+    return found
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_steganography import AsyncSteganography
+import asyncio
+import unittest
+
+class TestAsyncSteganography(unittest.TestCase):
+    def setUp(self):
+        self.jobs = [("medias/test.png", "medias/async.png"), ("medias/test.wav", "medias/async.wav")]
+        self.message = "Secret Message"
+
+    def test_encode_decode(self):
+        async def run():
+            async with AsyncSteganography(max_workers=2, limits={'image': 1}) as stego:
+                await asyncio.gather(*(stego.encode(src, self.message, dst) for src, dst in self.jobs))
+                return await asyncio.gather(*(stego.decode(dst) for _, dst in self.jobs))
+
+        for decoded_message in asyncio.run(run()):
+            self.assertEqual(self.message, decoded_message)
+
+    def test_decode_binary_to_file(self):
+        payload = b"\x00\x01bin"
+        output = "medias/async.bin"
+        self.addCleanup(lambda: os.remove(output) if os.path.exists(output) else None)
+
+        async def run():
+            async with AsyncSteganography(max_workers=1) as stego:
+                await stego.encode("medias/test.png", payload, "medias/async.png")
+                return await stego.decode("medias/async.png", output_path=output)
+
+        self.assertEqual(payload, asyncio.run(run()))
+        with open(output, 'rb') as f:
+            self.assertEqual(payload, f.read())
+
+    def test_unsupported_media(self):
+        async def run():
+            async with AsyncSteganography(max_workers=1) as stego:
+                await stego.decode("medias/missing.txt")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+    def tearDown(self):
+        for _, output in self.jobs:
+            if os.path.exists(output):
+                os.remove(output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from audio_steganography import AudioSteganography
+import io
+import wave
 import unittest
 
 class TestAudioSteganography(unittest.TestCase):
@@ -28,6 +30,34 @@ class TestAudioSteganography(unittest.TestCase):
         decoded_message = AudioSteganography.decode(self.encoded_audio)
         self.assertEqual(self.message, decoded_message)
 
+    def test_scatter_key(self):
+        # Scattered bits are only found again with the same scatter key
+        AudioSteganography.encode(self.test_audio, self.message, self.encoded_audio, scatter_key="scatter")
+        self.assertEqual(self.message, AudioSteganography.decode(self.encoded_audio, scatter_key="scatter"))
+        self.assertNotEqual(self.message, AudioSteganography.decode(self.encoded_audio))
+
+    def test_matrix_embedding(self):
+        AudioSteganography.encode(self.test_audio, self.message, self.encoded_audio, matrix_k=3)
+        self.assertEqual(self.message, AudioSteganography.decode(self.encoded_audio, matrix_k=3))
+
+    def test_stream_payload(self):
+        # Binary payloads (with null bytes) stream in from a file object and out to a sink
+        payload = bytes(range(256)) * 64
+        AudioSteganography.encode(self.test_audio, io.BytesIO(payload), self.encoded_audio, key="stream-key", chunk_size=1000)
+        sink = io.BytesIO()
+        self.assertEqual(len(payload), AudioSteganography.decode(self.encoded_audio, "stream-key", sink=sink))
+        self.assertEqual(payload, sink.getvalue())
+
+    def test_stream_payload_in_place(self):
+        # Re-encoding a binary payload into the same file must not truncate the carrier
+        AudioSteganography.encode(self.test_audio, self.message, self.encoded_audio)
+        with wave.open(self.encoded_audio, 'rb') as audio:
+            frames = audio.getnframes()
+        AudioSteganography.encode(self.encoded_audio, b'binary payload', self.encoded_audio)
+        with wave.open(self.encoded_audio, 'rb') as audio:
+            self.assertEqual(frames, audio.getnframes())
+        self.assertEqual(b'binary payload', AudioSteganography.decode(self.encoded_audio))
+
     def tearDown(self):
         if os.path.exists(self.encoded_audio):
             os.remove(self.encoded_audio)
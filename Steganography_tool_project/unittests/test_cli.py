@@ -0,0 +1,132 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steganography_cli import main, engines, EXIT_OK, EXIT_ERROR, EXIT_USAGE, EXIT_NOT_FOUND, EXIT_PARTIAL
+from steganography_daemon import StegoDaemon
+import contextlib
+import io
+import json
+import threading
+import unittest
+from unittest import mock
+
+def run(*argv):
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        code = main(list(argv))
+    return code, [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+class TestSteganographyCli(unittest.TestCase):
+    def setUp(self):
+        self.encoded_image = "medias/cli.png"
+        self.encoded_audio = "medias/cli.wav"
+        self.payload_file = "medias/cli.bin"
+        self.decoded_file = "medias/cli.out"
+        self.jobs_file = "medias/cli.jsonl"
+        self.message_file = "medias/cli.txt"
+        self.payload = bytes(range(256)) * 20
+        with open(self.payload_file, 'wb') as f:
+            f.write(self.payload)
+
+    def tearDown(self):
+        for path in (self.encoded_image, self.encoded_audio, self.payload_file, self.decoded_file, self.jobs_file,
+                     self.message_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_encode_decode(self):
+        code, [result] = run('encode', 'medias/test.png', self.encoded_image, '--message', "Secret Message",
+                             '--key', "0123456789abcdef")
+        self.assertEqual(EXIT_OK, code)
+        self.assertTrue(result['ok'])
+        self.assertIn('encode', result['timings'])
+        code, [result] = run('decode', self.encoded_image, '--key', "0123456789abcdef", '--output', self.decoded_file)
+        self.assertEqual(EXIT_OK, code)
+        with open(self.decoded_file) as f:
+            self.assertEqual("Secret Message", f.read())
+
+    def test_binary_payload(self):
+        code, _ = run('encode', 'medias/test.wav', self.encoded_audio, '--payload', self.payload_file, '--ecc', '8')
+        self.assertEqual(EXIT_OK, code)
+        code, [result] = run('decode', self.encoded_audio, '--output', self.decoded_file)
+        self.assertEqual(len(self.payload), result['bytes'])
+        with open(self.decoded_file, 'rb') as f:
+            self.assertEqual(self.payload, f.read())
+
+    def test_exit_codes(self):
+        code, [result] = run('decode', "medias/missing.png", '--output', self.decoded_file)
+        self.assertEqual(EXIT_NOT_FOUND, code)
+        self.assertFalse(result['ok'])
+        code, _ = run('encode', 'medias/test.png', self.encoded_image, '--payload', self.payload_file,
+                      '--scatter-key', "scatter")
+        self.assertEqual(EXIT_ERROR, code)
+        # Video-only options on another carrier are a usage error, not a failed encode
+        code, [result] = run('encode', 'medias/test.png', self.encoded_image, '--message', "Secret Message",
+                             '--codec', 'HFYU')
+        self.assertEqual(EXIT_USAGE, code)
+        self.assertIn("video", result['error'])
+        self.assertFalse(os.path.exists(self.encoded_image))
+        code, results = run('capacity', 'medias/test.png', "medias/missing.png")
+        self.assertEqual(EXIT_PARTIAL, code)
+        self.assertEqual([True, False], [r['ok'] for r in results])
+
+    def test_batch(self):
+        jobs = [
+            {'op': 'encode', 'path': 'medias/test.png', 'output': self.encoded_image, 'message': "Secret Message"},
+            {'op': 'capacity', 'path': 'medias/test.wav'},
+            {'op': 'decode', 'path': 'medias/encoded2.png'},
+        ]
+        with open(self.jobs_file, 'w') as f:
+            f.write('\n'.join(json.dumps(job) for job in jobs))
+        code, results = run('batch', self.jobs_file, '--workers', '2')
+        self.assertEqual(EXIT_OK, code)
+        self.assertEqual([0, 1, 2], sorted(r['index'] for r in results))
+        self.assertTrue(all(r['ok'] for r in results))
+
+    def write_jobs(self, jobs):
+        with open(self.jobs_file, 'w') as f:
+            f.write('\n'.join(json.dumps(job) for job in jobs))
+
+    def test_batch_encode_needs_source(self):
+        # Batch jobs never fall back to stdin for their payload
+        self.write_jobs([{'op': 'encode', 'path': 'medias/test.png', 'output': self.encoded_image},
+                         {'op': 'capacity', 'path': 'medias/test.wav'}])
+        for workers in ('1', '2'):
+            code, results = run('batch', self.jobs_file, '--workers', workers)
+            self.assertEqual(EXIT_PARTIAL, code)
+            failed = [r for r in results if not r['ok']]
+            self.assertEqual([0], [r['index'] for r in failed])
+            self.assertIn("message", failed[0]['error'])
+            self.assertFalse(os.path.exists(self.encoded_image))
+
+    def test_batch_daemon(self):
+        daemon = StegoDaemon(port=0, workers=1)
+        thread = threading.Thread(target=daemon.serve_forever)
+        thread.start()
+        try:
+            with open(self.message_file, 'w', encoding='utf-8') as f:
+                f.write("Secret Message")
+            self.write_jobs([
+                {'op': 'encode', 'path': 'medias/test.png', 'output': self.encoded_image, 'message_file': self.message_file},
+                {'op': 'encode', 'path': 'medias/test.png', 'output': self.encoded_image, 'payload': self.payload_file},
+                {'op': 'capacity', 'path': 'medias/test.wav'},
+            ])
+            host, port = daemon.address
+            with mock.patch.dict(engines):
+                code, results = run('--daemon', f"http://{host}:{port}", 'batch', self.jobs_file)
+                self.assertEqual(EXIT_PARTIAL, code)
+                self.assertEqual([True, False, True], [r['ok'] for r in results])
+                self.assertIn("Binary payloads", results[1]['error'])
+                self.assertIn('timings', results[0])
+                self.write_jobs([{'op': 'decode', 'path': self.encoded_image, 'decoded': self.decoded_file}])
+                code, [result] = run('--daemon', f"http://{host}:{port}", 'batch', self.jobs_file)
+            self.assertEqual(EXIT_OK, code)
+            with open(self.decoded_file) as f:
+                self.assertEqual("Secret Message", f.read())
+        finally:
+            daemon.shutdown()
+            thread.join()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steganography_daemon import StegoDaemon, StegoDaemonClient
+from image_steganography import ImageSteganography
+import base64
+import http.client
+import json
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+
+class TestStegoDaemon(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.daemon = StegoDaemon(port=0, workers=2)
+        cls.daemon.warm_up()
+        cls.thread = threading.Thread(target=cls.daemon.serve_forever)
+        cls.thread.start()
+        host, port = cls.daemon.address
+        cls.client = StegoDaemonClient(f"http://{host}:{port}")
+
+    def setUp(self):
+        self.test_image = "medias/test.png"
+        self.encoded_image = "medias/daemon.png"
+        self.message = "Secret Message"
+
+    def test_encode_decode(self):
+        self.client.encode(self.test_image, self.message, self.encoded_image)
+        self.assertEqual(self.message, self.client.decode(self.encoded_image))
+
+    def test_binary_payload(self):
+        # Binary payloads come back base64-encoded and the client returns bytes
+        payload = bytes(range(256))
+        ImageSteganography.encode(self.test_image, payload, self.encoded_image)
+        self.assertEqual(payload, self.client.decode(self.encoded_image))
+        reply = self.client.batch([{'op': 'decode', 'path': self.encoded_image}])[0]
+        self.assertEqual(payload, base64.b64decode(reply['result_base64']))
+
+    def test_batch(self):
+        results = self.client.batch([
+            {'op': 'capacity', 'path': self.test_image},
+            {'op': 'capacity', 'path': "medias/test.wav"},
+            {'op': 'decode', 'path': "medias/missing.png"},
+        ])
+        self.assertEqual(640 * 336 * 3 // 8 - 1, results[0]['result'])
+        self.assertTrue(results[1]['ok'])
+        self.assertFalse(results[2]['ok'])
+        with self.assertRaises(ValueError):
+            self.client.capacity("medias/missing.png")
+
+    def test_relative_paths(self):
+        # Paths are resolved in the client's working directory, not the daemon's
+        cwd = os.getcwd()
+        os.chdir("medias")
+        try:
+            self.client.encode("test.png", self.message, "daemon.png")
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(self.message, self.client.decode(self.encoded_image))
+
+    def test_non_object_body(self):
+        for op, body in (('decode', [1, 2]), ('batch', "jobs"), ('batch', {'jobs': [1]})):
+            reply = self.client._post(op, body)
+            self.assertFalse(reply['ok'])
+        self.assertEqual(640 * 336 * 3 // 8 - 1, self.client.capacity(self.test_image))
+
+    def post(self, headers: dict, path: str = "/capacity"):
+        host, port = self.daemon.address
+        connection = http.client.HTTPConnection(host, port)
+        try:
+            connection.request('POST', path, body=json.dumps({'path': os.path.abspath(self.test_image)}),
+                               headers=headers)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def test_rejects_browser_requests(self):
+        json_type = {'Content-Type': 'application/json'}
+        self.assertEqual(200, self.post(json_type)[0])
+        # A web page can send text/plain cross-origin without a preflight, or rebind a DNS name to 127.0.0.1
+        for headers in ({'Content-Type': 'text/plain'},
+                        dict(json_type, Origin="http://evil.example"),
+                        dict(json_type, Host="evil.example:8765")):
+            status, reply = self.post(headers)
+            self.assertEqual(403, status)
+            self.assertFalse(reply['ok'])
+
+    def test_loopback_only(self):
+        for host in ("0.0.0.0", "192.168.1.10", "example.com"):
+            with self.assertRaises(ValueError):
+                StegoDaemon(host=host, port=0, workers=1)
+
+    def test_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        socket_path = os.path.join(directory, "daemon.sock")
+        daemon = StegoDaemon(workers=1, socket_path=socket_path)
+        thread = threading.Thread(target=daemon.serve_forever)
+        thread.start()
+        try:
+            self.assertEqual(0o600, stat.S_IMODE(os.stat(socket_path).st_mode))
+            client = StegoDaemonClient(f"unix:{socket_path}")
+            client.encode(self.test_image, self.message, self.encoded_image)
+            self.assertEqual(self.message, client.decode(self.encoded_image))
+        finally:
+            daemon.shutdown()
+            thread.join()
+        self.assertFalse(os.path.exists(socket_path))
+
+    def tearDown(self):
+        if os.path.exists(self.encoded_image):
+            os.remove(self.encoded_image)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.daemon.shutdown()
+        cls.thread.join()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from image_steganography import ImageSteganography
+import io
+import numpy as np
+from PIL import Image
 import unittest
 
 class TestImageSteganography(unittest.TestCase):
@@ -26,9 +29,88 @@ class TestImageSteganography(unittest.TestCase):
         decoded_message = ImageSteganography.decode(self.encoded_image)
         self.assertEqual(self.message, decoded_message)
 
+    def test_scatter_key(self):
+        # Scattered bits are only found again with the same scatter key
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image, scatter_key="scatter")
+        self.assertEqual(self.message, ImageSteganography.decode(self.encoded_image, scatter_key="scatter"))
+        self.assertNotEqual(self.message, ImageSteganography.decode(self.encoded_image))
+
+    def test_matrix_embedding(self):
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image, matrix_k=3)
+        self.assertEqual(self.message, ImageSteganography.decode(self.encoded_image, matrix_k=3))
+
+    def test_ecc_repairs_flipped_bits(self):
+        ImageSteganography.encode(self.test_image, self.message, self.encoded_image, key="0123456789abcdef", ecc=8)
+        pixels = np.array(Image.open(self.encoded_image))
+        colours = pixels[..., :3].reshape(-1)
+        colours[[3, 200, 1000, 1500]] ^= 1  # One header copy and a few payload bits
+        pixels[..., :3] = colours.reshape(pixels[..., :3].shape)
+        Image.fromarray(pixels).save(self.encoded_image)
+        self.assertEqual(self.message, ImageSteganography.decode(self.encoded_image, "0123456789abcdef"))
+
+    def test_stream_payload(self):
+        # Binary payloads (with null bytes) stream in from a file object and out to a sink
+        payload = bytes(range(256)) * 64
+        ImageSteganography.encode(self.test_image, io.BytesIO(payload), self.encoded_image, key="stream-key", chunk_size=1000)
+        sink = io.BytesIO()
+        self.assertEqual(len(payload), ImageSteganography.decode(self.encoded_image, "stream-key", sink=sink))
+        self.assertEqual(payload, sink.getvalue())
+
     def tearDown(self):
         if os.path.exists(self.encoded_image):
             os.remove(self.encoded_image)
 
+class TestTiledImageSteganography(unittest.TestCase):
+    def setUp(self):
+        # Uncompressed three-page TIFF built from the test image
+        pixels = np.asarray(Image.open("medias/test.png").convert("RGB"))
+        self.pages = [pixels, pixels[::-1].copy(), pixels[:, ::-1].copy()]
+        self.test_tiff = "medias/tiled.tif"
+        self.encoded_tiff = "medias/encoded_tiled.tif"
+        Image.fromarray(self.pages[0]).save(self.test_tiff, save_all=True,
+                                            append_images=[Image.fromarray(p) for p in self.pages[1:]])
+
+    def test_multi_page(self):
+        # Larger than the first page, so the second page supplies the rest
+        message = "Secret Message " * 6000
+        ImageSteganography.encode_tiled(self.test_tiff, message, self.encoded_tiff, tile_bytes=64 * 1024)
+        self.assertEqual(message, ImageSteganography.decode_tiled(self.encoded_tiff, tile_bytes=10000))
+        img = Image.open(self.encoded_tiff)
+        img.seek(2)
+        np.testing.assert_array_equal(self.pages[2], np.asarray(img))
+
+    def test_stream_payload(self):
+        payload = bytes(range(256)) * 64
+        ImageSteganography.encode_tiled(self.test_tiff, io.BytesIO(payload), self.encoded_tiff, key="tile-key")
+        sink = io.BytesIO()
+        ImageSteganography.decode_tiled(self.encoded_tiff, "tile-key", sink=sink)
+        self.assertEqual(payload, sink.getvalue())
+
+    def test_bmp_matches_encode(self):
+        # BMP rows are stored bottom-up in BGR order; both modes must use the same bit layout
+        test_bmp, tiled_bmp, encoded_bmp = "medias/tiled.bmp", "medias/tiled_out.bmp", "medias/encoded.bmp"
+        try:
+            Image.fromarray(self.pages[0]).save(test_bmp)
+            message = "Secret Message " * 500
+            ImageSteganography.encode_tiled(test_bmp, message, tiled_bmp, tile_bytes=10000)
+            ImageSteganography.encode(test_bmp, message, encoded_bmp)
+            self.assertEqual(message, ImageSteganography.decode(tiled_bmp))
+            self.assertEqual(message, ImageSteganography.decode_tiled(encoded_bmp, tile_bytes=10000))
+            np.testing.assert_array_equal(np.asarray(Image.open(encoded_bmp)), np.asarray(Image.open(tiled_bmp)))
+        finally:
+            for path in (test_bmp, tiled_bmp, encoded_bmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_compressed_rejected(self):
+        Image.fromarray(self.pages[0]).save(self.test_tiff, compression="tiff_lzw")
+        with self.assertRaises(ValueError):
+            ImageSteganography.encode_tiled(self.test_tiff, "Secret Message", self.encoded_tiff)
+
+    def tearDown(self):
+        for path in (self.test_tiff, self.encoded_tiff):
+            if os.path.exists(path):
+                os.remove(path)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matrix_embedding import block_size, elements_for_bits, hamming_embed, hamming_extract, embed_bits
+import numpy as np
+import unittest
+
+class TestMatrixEmbedding(unittest.TestCase):
+    def test_roundtrip(self):
+        rng = np.random.default_rng(0)
+        for k in (1, 2, 3, 4, 8):
+            with self.subTest(k=k):
+                bits = rng.integers(0, 2, 1001, dtype=np.uint8)
+                cover = rng.integers(0, 2, elements_for_bits(len(bits), k), dtype=np.uint8)
+                flips = hamming_embed(cover, bits, k)
+                # At most one change per block
+                self.assertEqual(len(flips), len(set((flips // block_size(k)).tolist())))
+                cover[flips] ^= 1
+                np.testing.assert_array_equal(bits, hamming_extract(cover, k)[:len(bits)])
+
+    def test_fewer_changes_than_lsb(self):
+        rng = np.random.default_rng(1)
+        bits = rng.integers(0, 2, 30000, dtype=np.uint8)
+        carrier = rng.integers(0, 256, 100000, dtype=np.uint8)
+        lsb_changes = embed_bits(carrier.copy(), bits, carrier.size)
+        matrix_changes = embed_bits(carrier.copy(), bits, carrier.size, matrix_k=3)
+        self.assertLess(matrix_changes, lsb_changes)
+
+    def test_invalid_k(self):
+        with self.assertRaises(ValueError):
+            block_size(0)
+
+if __name__ == "__main__":
+    unittest.main()
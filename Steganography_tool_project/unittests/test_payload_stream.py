@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from payload_stream import BitFeeder, PayloadReader, iter_container, iter_container_bits, has_container_magic
+import io
+import numpy as np
+import unittest
+
+class TestPayloadStream(unittest.TestCase):
+    def setUp(self):
+        self.payload = os.urandom(10000)
+
+    def test_roundtrip(self):
+        for key in (None, "stream-key"):
+            with self.subTest(key=key):
+                container = b''.join(iter_container(io.BytesIO(self.payload), key, chunk_size=333))
+                sink = io.BytesIO()
+                reader = PayloadReader(sink, key)
+                # Feeding one byte at a time must work, as must trailing carrier bytes
+                for i in range(len(container)):
+                    done = reader.feed(container[i:i + 1])
+                self.assertTrue(done)
+                self.assertEqual(self.payload, sink.getvalue())
+
+    def test_wrong_key(self):
+        container = b''.join(iter_container([self.payload], "stream-key"))
+        with self.assertRaises(ValueError):
+            PayloadReader(io.BytesIO(), "other-key").feed(container)
+        with self.assertRaises(ValueError):
+            PayloadReader(io.BytesIO()).feed(container)
+
+    def test_ecc_repairs_damage(self):
+        container = bytearray(b''.join(iter_container(io.BytesIO(self.payload), "stream-key", ecc=16)))
+        rng = np.random.default_rng(0)
+        # One damaged header copy (magic included), then a few bytes in each block
+        container[0] ^= 0xFF
+        container[5] ^= 0x02
+        for start in range(21, len(container), 255):
+            for position in rng.choice(np.arange(start, min(start + 255, len(container))), 8, replace=False):
+                container[position] ^= 0x81
+        self.assertTrue(has_container_magic(bytes(container)))
+        sink = io.BytesIO()
+        reader = PayloadReader(sink, "stream-key")
+        self.assertTrue(reader.feed(bytes(container) + os.urandom(2000)))
+        self.assertEqual(self.payload, sink.getvalue())
+        self.assertGreater(reader.corrected, 0)
+        self.assertFalse(reader.text)
+
+    def test_text_flag(self):
+        container = b''.join(iter_container(["caf\u00e9".encode('utf-8')], ecc=4, text=True))
+        target = io.BytesIO()
+        reader = PayloadReader(target)
+        self.assertTrue(reader.feed(container))
+        self.assertEqual("caf\u00e9", reader.result(None, target))
+
+    def test_bit_feeder(self):
+        feeder = BitFeeder(iter_container_bits([self.payload], chunk_size=100))
+        pieces = []
+        while not feeder.exhausted:
+            pieces.append(feeder.take(999))
+        bits = np.concatenate(pieces)
+        self.assertEqual(b''.join(iter_container([self.payload])), np.packbits(bits).tobytes())
+
+if __name__ == "__main__":
+    unittest.main()
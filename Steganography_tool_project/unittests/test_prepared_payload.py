@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prepared_payload import PreparedPayload
+from image_steganography import ImageSteganography
+from audio_steganography import AudioSteganography
+from video_steganography import VideoSteganography
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pickle
+import unittest
+
+def _packed_in_worker(payload):
+    return payload.packed('length').tobytes()
+
+class TestPreparedPayload(unittest.TestCase):
+    def setUp(self):
+        self.message = "Prepared once, stamped many times"
+        self.key = "0123456789abcdef"
+        self.outputs = ["medias/prepared.png", "medias/prepared.wav", "medias/prepared.avi"]
+
+    def tearDown(self):
+        for path in self.outputs:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_all_engines(self):
+        payload = PreparedPayload(self.message, self.key)
+        ImageSteganography.encode("medias/test.png", payload, self.outputs[0], matrix_k=3)
+        AudioSteganography.encode("medias/test.wav", payload, self.outputs[1], scatter_key="scatter")
+        VideoSteganography.encode("medias/test.avi", payload, self.outputs[2])
+        self.assertEqual(self.message, ImageSteganography.decode(self.outputs[0], self.key, matrix_k=3))
+        self.assertEqual(self.message, AudioSteganography.decode(self.outputs[1], self.key, scatter_key="scatter"))
+        self.assertEqual(self.message, VideoSteganography.decode(self.outputs[2], self.key))
+
+        with self.assertRaises(ValueError):
+            ImageSteganography.encode("medias/test.png", payload, self.outputs[0], key=self.key)
+        with self.assertRaises(ValueError):
+            VideoSteganography.encode("medias/test.avi", payload, self.outputs[2], append=True)
+
+    def test_immutable_and_picklable(self):
+        payload = PreparedPayload(self.message, "short key")
+        with self.assertRaises(AttributeError):
+            payload._packed = {}
+        with self.assertRaises(ValueError):
+            payload.packed('length')[0] = 0
+        # AES-ECB rejects this key, which only matters once an image or audio engine asks
+        with self.assertRaises(ValueError):
+            payload.bits_for('image')
+        copy = pickle.loads(pickle.dumps(payload))
+        np.testing.assert_array_equal(payload.bits_for('video'), copy.bits_for('video'))
+
+    def test_shared_memory(self):
+        payload = PreparedPayload(self.message, self.key, media=('video',))
+        shared = payload.share()
+        try:
+            # Workers receive the block's name, not the payload
+            self.assertNotIn(payload.packed('length').tobytes(), pickle.dumps(shared))
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                results = list(pool.map(_packed_in_worker, [shared] * 4))
+            self.assertEqual([payload.packed('length').tobytes()] * 4, results)
+        finally:
+            shared.unlink()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reed_solomon import BLOCK_SIZE, encode_blocks, decode_blocks, syndromes
+import numpy as np
+import unittest
+
+class TestReedSolomon(unittest.TestCase):
+    def test_corrects_up_to_half_nsym(self):
+        rng = np.random.default_rng(0)
+        for nsym in (2, 10, 32, 64):
+            with self.subTest(nsym=nsym):
+                data = rng.integers(0, 256, (50, BLOCK_SIZE - nsym), dtype=np.uint8)
+                codewords = encode_blocks(data, nsym)
+                self.assertFalse(syndromes(codewords, nsym).any())
+                # Every other block gets the most errors it can take, anywhere in the block
+                for block in range(0, 50, 2):
+                    positions = rng.choice(BLOCK_SIZE, nsym // 2, replace=False)
+                    codewords[block, positions] ^= rng.integers(1, 256, len(positions), dtype=np.uint8)
+                decoded, corrected, failed = decode_blocks(codewords, nsym)
+                np.testing.assert_array_equal(data, decoded)
+                self.assertEqual(25 * (nsym // 2), corrected)
+                self.assertFalse(failed.any())
+
+    def test_reports_uncorrectable(self):
+        data = np.random.default_rng(1).integers(0, 256, (3, BLOCK_SIZE - 16), dtype=np.uint8)
+        codewords = encode_blocks(data, 16)
+        codewords[1, :40] ^= 0x5A
+        decoded, _, failed = decode_blocks(codewords, 16)
+        self.assertEqual([False, True, False], failed.tolist())
+        np.testing.assert_array_equal(data[[0, 2]], decoded[[0, 2]])
+
+    def test_invalid_nsym(self):
+        with self.assertRaises(ValueError):
+            encode_blocks(np.zeros((1, 10), dtype=np.uint8), 0)
+        with self.assertRaises(ValueError):
+            syndromes(np.zeros((1, BLOCK_SIZE), dtype=np.uint8), BLOCK_SIZE)
+
+if __name__ == "__main__":
+    unittest.main()
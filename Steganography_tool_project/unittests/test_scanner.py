@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_steganography import AudioSteganography
+from image_steganography import ImageSteganography
+from steganography_scanner import scan, scan_file, chi_square_probability, _first_rows
+from PIL import Image
+import numpy as np
+import unittest
+
+class TestSteganographyScanner(unittest.TestCase):
+    def setUp(self):
+        self.encoded_audio = "medias/scan.wav"
+        AudioSteganography.encode("medias/test.wav", "Secret Message", self.encoded_audio)
+
+    def test_scan_file(self):
+        self.assertTrue(scan_file(self.encoded_audio)['payload'])
+        self.assertTrue(scan_file("medias/encoded2.png")['payload'])
+        self.assertFalse(scan_file("medias/test.wav")['payload'])
+        self.assertIn('error', scan_file("medias/missing.txt"))
+
+    def test_scan_paths(self):
+        results = {r['path']: r for r in scan(["medias/test.png", self.encoded_audio], workers=2)}
+        self.assertFalse(results["medias/test.png"]['payload'])
+        self.assertTrue(results[self.encoded_audio]['payload'])
+
+    def test_first_rows_only(self):
+        # PNG and bottom-up BMP decoders stop after the rows the header check needs
+        pixels = np.asarray(Image.open("medias/test.png").convert("RGB"))
+        for path in ("medias/scan.png", "medias/scan.bmp"):
+            with self.subTest(path=path):
+                try:
+                    Image.fromarray(pixels).save(path)
+                    img = Image.open(path)
+                    np.testing.assert_array_equal(pixels[:2], _first_rows(img, 2))
+                    self.assertEqual(2, img.size[1])
+                    ImageSteganography.encode(path, "Secret Message", path)
+                    self.assertTrue(scan_file(path)['payload'])
+                    self.assertIn('chi_square', scan_file(path, chi_square=True))
+                finally:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def test_chi_square(self):
+        rng = np.random.default_rng(0)
+        # Smooth histogram: even values twice as common as their odd neighbours
+        cover = np.repeat(np.arange(0, 256, 2, dtype=np.uint8), 1000)
+        cover = np.concatenate([cover, cover, cover + 1])
+        self.assertLess(chi_square_probability(cover), 0.05)
+        stego = (cover & 0xFE) | rng.integers(0, 2, cover.size, dtype=np.uint8)
+        self.assertGreater(chi_square_probability(stego), 0.95)
+
+    def tearDown(self):
+        if os.path.exists(self.encoded_audio):
+            os.remove(self.encoded_audio)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scattering import FeistelPermutation, carrier_positions
+import numpy as np
+import unittest
+
+class TestScattering(unittest.TestCase):
+    def test_bijection(self):
+        for domain_size in (1, 2, 7, 1000, 4097):
+            with self.subTest(domain_size=domain_size):
+                positions = FeistelPermutation("key", domain_size).permute(np.arange(domain_size))
+                self.assertEqual(list(range(domain_size)), sorted(positions.tolist()))
+
+    def test_keyed_positions(self):
+        domain_size = 10 ** 12  # Far too large for a permutation table
+        first = carrier_positions(0, 64, domain_size, "key")
+        self.assertEqual(64, len(set(first.tolist())))
+        self.assertTrue(((first >= 0) & (first < domain_size)).all())
+        np.testing.assert_array_equal(first[32:], carrier_positions(32, 32, domain_size, "key"))
+        self.assertFalse(np.array_equal(first, carrier_positions(0, 64, domain_size, "other")))
+        np.testing.assert_array_equal(np.arange(64), carrier_positions(0, 64, domain_size))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sharded_steganography import ShardedSteganography
+from image_steganography import ImageSteganography
+import unittest
+
+class TestShardedSteganography(unittest.TestCase):
+    def setUp(self):
+        self.carriers = ["medias/test.png", "medias/test.wav"]
+        self.outputs = ["medias/shard0.png", "medias/shard1.wav"]
+        self.message = "Secret Message " * 200
+        self.key = "shard-key"
+
+    def test_encode_decode(self):
+        outputs = ShardedSteganography.encode(self.carriers, self.message, self.outputs, self.key)
+        self.assertEqual(self.outputs, outputs)
+        # Carrier order does not matter and unrelated carriers are skipped
+        decoded_message = ShardedSteganography.decode(["medias/test.png"] + outputs[::-1], self.key)
+        self.assertEqual(self.message, decoded_message)
+
+    def test_binary_carrier_skipped(self):
+        outputs = ShardedSteganography.encode(self.carriers, self.message, self.outputs, self.key)
+        # A carrier holding a binary payload decodes to bytes and is not a shard
+        ImageSteganography.encode("medias/test.png", b"\0binary\0", "medias/binary.png")
+        self.outputs.append("medias/binary.png")
+        self.assertEqual(self.message, ShardedSteganography.decode(["medias/binary.png"] + outputs, self.key))
+
+    def test_incomplete_set(self):
+        ShardedSteganography.encode(self.carriers, self.message, self.outputs)
+        with self.assertRaises(ValueError):
+            ShardedSteganography.decode(self.outputs[:1])
+        # Shards only authenticate under the key they were written with
+        with self.assertRaises(ValueError):
+            ShardedSteganography.decode(self.outputs, "wrong-key")
+
+    def test_single_base64_layer(self):
+        # Encrypted shards are base64-encoded once, not ciphertext base64-encoded twice
+        message = "x" * 3000
+        [shard] = ShardedSteganography.split(message, [100000], self.key)
+        self.assertLess(len(shard), len(message) * 4 // 3 + 200)
+        self.assertEqual(message, ShardedSteganography.join([shard], self.key))
+
+    def test_message_too_large(self):
+        with self.assertRaises(ValueError):
+            ShardedSteganography.split("x" * 1000, [100, 200])
+
+    def tearDown(self):
+        for output in self.outputs:
+            if os.path.exists(output):
+                os.remove(output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,14 +2,24 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from video_steganography import VideoSteganography
+from video_steganography import VideoSteganography, LOSSLESS_CODECS, CODEC_PROFILES
+import io
+import json
+import shutil
+import hashlib
 import unittest
+from unittest import mock
 
 class TestVideoSteganography(unittest.TestCase):
     def setUp(self):
         self.test_video = "medias/test.avi"  # Ensure this file exists
         self.encoded_video = "medias/encoded.avi"
         self.message = "Secret Message"
+        # Never touch the developer's real calibration cache
+        self.calibration_file = "medias/calibration.json"
+        patcher = mock.patch('video_steganography.CALIBRATION_FILE', self.calibration_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_encode_decode(self):
         VideoSteganography.encode(self.test_video, self.message, self.encoded_video)
@@ -32,9 +42,101 @@ class TestVideoSteganography(unittest.TestCase):
         decoded_message = VideoSteganography.decode(self.encoded_video)
         self.assertEqual(self.message, decoded_message)
 
+    def test_lossless_codecs(self):
+        # Every codec offered must round-trip the embedded LSBs exactly
+        codecs = VideoSteganography.available_codecs()
+        self.assertIn('FFV1', codecs)
+        for codec in codecs:
+            with self.subTest(codec=codec):
+                VideoSteganography.encode(self.test_video, self.message, self.encoded_video, codec=codec)
+                decoded_message = VideoSteganography.decode(self.encoded_video)
+                self.assertEqual(self.message, decoded_message)
+
+    def test_codec_profiles(self):
+        for profile in CODEC_PROFILES:
+            self.assertIn(VideoSteganography.select_codec(profile=profile), LOSSLESS_CODECS)
+        self.assertEqual('HFYU', VideoSteganography.select_codec('hfyu', 'smallest'))
+        with self.assertRaises(ValueError):
+            VideoSteganography.select_codec('MJPG')
+
+    def test_calibration_cached_once(self):
+        # Scored on real frames, the profiles pick a small codec for smallest and
+        # never trade a many times larger file for speed in balanced
+        VideoSteganography.calibrate_codecs(self.test_video)
+        self.assertEqual('FFV1', VideoSteganography.select_codec(profile='smallest'))
+        self.assertNotIn(VideoSteganography.select_codec(profile='balanced'), ('RAW', 'MPNG'))
+        with mock.patch.object(VideoSteganography, '_codec_roundtrips', return_value=(False, 0.0, 0)) as roundtrips:
+            # Encodes reuse the one calibration instead of measuring every input
+            VideoSteganography.encode(self.test_video, self.message, self.encoded_video, profile='fastest')
+            VideoSteganography.calibrate_codecs()
+            VideoSteganography.calibrate_codecs(self.test_video)
+            roundtrips.assert_not_called()
+            # Asking for another sample recalibrates
+            VideoSteganography.calibrate_codecs(self.encoded_video)
+            roundtrips.assert_called()
+
+    def test_scatter_key(self):
+        # Scattered bits are only found again with the same scatter key
+        VideoSteganography.encode(self.test_video, self.message, self.encoded_video, scatter_key="scatter")
+        self.assertEqual(self.message, VideoSteganography.decode(self.encoded_video, scatter_key="scatter"))
+        self.assertNotEqual(self.message, VideoSteganography.decode(self.encoded_video))
+
+    def test_matrix_embedding(self):
+        VideoSteganography.encode(self.test_video, self.message, self.encoded_video, matrix_k=3)
+        self.assertEqual(self.message, VideoSteganography.decode(self.encoded_video, matrix_k=3))
+
+    def test_stream_payload(self):
+        # Binary payloads (with null bytes) stream in from a file object and out to a sink
+        payload = bytes(range(256)) * 64
+        VideoSteganography.encode(self.test_video, io.BytesIO(payload), self.encoded_video, key="stream-key", chunk_size=1000, codec='HFYU')
+        sink = io.BytesIO()
+        self.assertEqual(len(payload), VideoSteganography.decode(self.encoded_video, "stream-key", sink=sink))
+        self.assertEqual(payload, sink.getvalue())
+
+    def test_resume_after_crash(self):
+        # The first run dies mid-way through its second segment; the rerun only embeds the rest
+        embed_frame = VideoSteganography._embed_frame
+        calls = []
+        def crash_at_frame_450(*args):
+            calls.append(1)
+            if len(calls) == 450:
+                raise KeyboardInterrupt
+            return embed_frame(*args)
+
+        output = "medias/resumed.avi"
+        self.addCleanup(shutil.rmtree, output + '.parts', ignore_errors=True)
+        self.addCleanup(lambda: os.remove(output) if os.path.exists(output) else None)
+        options = dict(key="resume-key", scatter_key="scatter", codec='HFYU', segment_frames=300)
+        with mock.patch.object(VideoSteganography, '_embed_frame', side_effect=crash_at_frame_450):
+            with self.assertRaises(KeyboardInterrupt):
+                VideoSteganography.encode_resumable(self.test_video, self.message, output, **options)
+        self.assertFalse(os.path.exists(output))
+
+        # The checkpoint holds nothing that confirms a guessed key or message offline
+        with open(os.path.join(output + '.parts', 'manifest.json')) as f:
+            manifest = json.load(f)
+        with open(os.path.join(output + '.parts', 'payload.bin'), 'rb') as f:
+            payload = f.read()
+        self.assertNotIn(self.message.encode(), payload)
+        for guess in (f"resume-key\0{self.message}", "scatter"):
+            self.assertNotIn(hashlib.sha256(guess.encode()).hexdigest(), json.dumps(manifest))
+        matches = VideoSteganography._checkpoint_matches
+        self.assertTrue(matches(manifest, payload, self.message, "resume-key", "scatter"))
+        self.assertFalse(matches(manifest, payload, self.message, "other-key", "scatter"))
+        self.assertFalse(matches(manifest, payload, "Other Message", "resume-key", "scatter"))
+        self.assertFalse(matches(manifest, payload, self.message, "resume-key", "other-scatter"))
+
+        calls.clear()
+        with mock.patch.object(VideoSteganography, '_embed_frame', side_effect=embed_frame) as resumed:
+            VideoSteganography.encode_resumable(self.test_video, self.message, output, **options)
+        self.assertEqual(901 - 300, resumed.call_count)
+        self.assertFalse(os.path.exists(output + '.parts'))
+        self.assertEqual(self.message, VideoSteganography.decode(output, "resume-key", scatter_key="scatter"))
+
     def tearDown(self):
-        if os.path.exists(self.encoded_video):
-            os.remove(self.encoded_video)
+        for path in (self.encoded_video, self.calibration_file):
+            if os.path.exists(path):
+                os.remove(path)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
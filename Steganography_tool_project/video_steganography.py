@@ -6,6 +6,39 @@ from Crypto.Hash import SHA256
 import base64
 import tempfile
 import shutil
+import json
+import time
+import struct
+import io
+import hashlib
+import subprocess
+from scattering import carrier_positions, text_to_bits
+from matrix_embedding import elements_for_bits, hamming_embed, hamming_extract
+from prepared_payload import PreparedPayload, prepared_bits
+from payload_stream import (DEFAULT_CHUNK_SIZE, BitFeeder, PayloadReader, is_stream_source, iter_container_bits,
+                            has_container_magic, write_text, container_source, PROBE_BYTES)
+
+# Output codecs that keep every pixel bit-exact when written to AVI.
+# MJPG is deliberately absent: OpenCV's MJPEG writer is lossy and destroys LSBs.
+LOSSLESS_CODECS = {
+    'FFV1': 'FFV1',  # FFmpeg video codec 1: small files, slow encoder
+    'HFYU': 'HFYU',  # HuffYUV: fast, larger files
+    'MPNG': 'MPNG',  # PNG-in-AVI: per-frame PNG compression
+    'RAW': 'RGBA',   # uncompressed 32-bit frames: fastest, largest
+}
+
+CODEC_PROFILES = ('fastest', 'smallest', 'balanced')
+
+DEFAULT_CODEC = 'FFV1'
+
+# Frames per checkpointed segment in encode_resumable()
+DEFAULT_SEGMENT_FRAMES = 300
+MANIFEST_VERSION = 2
+SCATTER_CHECK_ROUNDS = 100000
+
+CALIBRATION_FILE = os.environ.get(
+    'STEGO_CODEC_CALIBRATION',
+    os.path.join(os.path.expanduser('~'), '.steganography_tool', 'codec_calibration.json'))
 
 
 class VideoSteganography:
@@ -14,11 +47,24 @@ class VideoSteganography:
         return SHA256.new(key.encode()).digest()[:32]
 
     @staticmethod
-    def encrypt_message(key: str, message: str) -> str:
+    def encrypt_bytes(key: str, data: bytes) -> bytes:
+        """Encrypts raw bytes; returns nonce + tag + ciphertext."""
         cipher = AES.new(VideoSteganography._process_key(key), AES.MODE_EAX)
-        ciphertext, tag = cipher.encrypt_and_digest(message.encode())
-        combined = cipher.nonce + tag + ciphertext
-        return base64.b64encode(combined).decode()
+        ciphertext, tag = cipher.encrypt_and_digest(data)
+        return cipher.nonce + tag + ciphertext
+
+    @staticmethod
+    def decrypt_bytes(key: str, data: bytes) -> bytes:
+        try:
+            nonce, tag, ciphertext = data[:16], data[16:32], data[32:]
+            cipher = AES.new(VideoSteganography._process_key(key), AES.MODE_EAX, nonce)
+            return cipher.decrypt_and_verify(ciphertext, tag)
+        except Exception as e:
+            raise ValueError(f"Decryption failed: {str(e)}")
+
+    @staticmethod
+    def encrypt_message(key: str, message: str) -> str:
+        return base64.b64encode(VideoSteganography.encrypt_bytes(key, message.encode())).decode()
 
     @staticmethod
     def decrypt_message(key: str, encrypted_msg: str) -> str:
@@ -41,7 +87,242 @@ class VideoSteganography:
         return frame_count * height * width * 3
 
     @staticmethod
-    def encode(video_path: str, message: str, output_path: str, key: str = None, append: bool = False) -> None:
+    def capacity(video_path: str) -> int:
+        """Returns how many message bytes (after encryption) fit into the video."""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open input video: {video_path}")
+        try:
+            return max((VideoSteganography._get_video_capacity(cap) - 64) // 8, 0)  # Minus the length header
+        finally:
+            cap.release()
+
+    @staticmethod
+    def _codec_roundtrips(codec: str, frames: list, path: str) -> tuple:
+        """Writes frames with codec and reads them back; returns (exact, seconds, bytes)."""
+        height, width = frames[0].shape[:2]
+        start = time.perf_counter()
+        out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*LOSSLESS_CODECS[codec]), 30.0,
+                              (width, height), isColor=True)
+        if not out.isOpened():
+            return False, 0.0, 0
+        for frame in frames:
+            out.write(frame)
+        out.release()
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        cap = cv2.VideoCapture(path)
+        exact = cap.isOpened()
+        for frame in frames:
+            ret, decoded = cap.read()
+            if not ret or not np.array_equal(decoded, frame):
+                exact = False
+                break
+        cap.release()
+        return exact, elapsed, size
+
+    @staticmethod
+    def _calibration_frames(sample_path: str = None, frame_count: int = 8) -> list:
+        """Frames the codecs are measured on: the sample's first frames, or a smooth synthetic scene.
+
+        Their LSBs are randomized, since that is what the codecs see once a payload is embedded.
+        """
+        frames = []
+        if sample_path:
+            cap = cv2.VideoCapture(sample_path)
+            while cap.isOpened() and len(frames) < frame_count:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            cap.release()
+        if not frames:
+            # Uniform noise compresses equally badly with every codec; pan over a smooth texture instead
+            noise = np.random.default_rng(1).integers(0, 256, (270 + 2 * frame_count, 480 + 4 * frame_count, 3))
+            texture = cv2.GaussianBlur(noise.astype(np.float32), (0, 0), 8)
+            texture = ((texture - texture.mean()) * 4 + 128).clip(0, 255).astype(np.uint8)
+            frames = [texture[2 * i:2 * i + 270, 4 * i:4 * i + 480] for i in range(frame_count)]
+        rng = np.random.default_rng(0)
+        return [(frame & 0xFE) | rng.integers(0, 2, frame.shape, dtype=np.uint8) for frame in frames]
+
+    @staticmethod
+    def _calibration_key(sample_path: str = None) -> str:
+        if not sample_path or not os.path.exists(sample_path):
+            return 'synthetic'
+        stat = os.stat(sample_path)
+        return f"{os.path.abspath(sample_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    @staticmethod
+    def calibrate_codecs(sample_path: str = None, force: bool = False) -> dict:
+        """Measures every lossless codec once and caches the result on disk.
+
+        Returns a mapping of codec name to {"seconds", "bytes"} for the codecs that
+        open in the local OpenCV build and round-trip the frames bit-exactly. Without
+        a sample a synthetic scene is measured; pass a representative video to
+        calibrate on it instead. Either way the one cached result serves every
+        later encode until force or a different sample is given.
+        """
+        build = cv2.__version__
+        sample = VideoSteganography._calibration_key(sample_path)
+        if not force and os.path.exists(CALIBRATION_FILE):
+            try:
+                with open(CALIBRATION_FILE, 'r') as f:
+                    cached = json.load(f)
+                if (cached.get('opencv') == build and cached.get('codecs')
+                        and (sample_path is None or cached.get('sample') == sample)):
+                    return cached['codecs']
+            except (OSError, ValueError):
+                pass
+
+        frames = VideoSteganography._calibration_frames(sample_path)
+        results = {}
+        temp_dir = tempfile.mkdtemp()
+        try:
+            for codec in LOSSLESS_CODECS:
+                path = os.path.join(temp_dir, f"{codec}.avi")
+                exact, elapsed, size = VideoSteganography._codec_roundtrips(codec, frames, path)
+                if exact:
+                    results[codec] = {'seconds': elapsed, 'bytes': size}
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        # Written to a temp file and moved into place, as parallel workers may calibrate at once
+        temp_path = None
+        try:
+            directory = os.path.dirname(CALIBRATION_FILE) or '.'
+            os.makedirs(directory, exist_ok=True)
+            temp_fd, temp_path = tempfile.mkstemp(suffix='.json', dir=directory)
+            with os.fdopen(temp_fd, 'w') as f:
+                json.dump({'opencv': build, 'sample': sample, 'codecs': results}, f, indent=2)
+            os.replace(temp_path, CALIBRATION_FILE)
+        except OSError as e:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            print(f"Warning: Could not save codec calibration - {str(e)}")
+        return results
+
+    @staticmethod
+    def available_codecs() -> list:
+        """Lists the lossless codecs usable with the local OpenCV/FFmpeg build."""
+        return sorted(VideoSteganography.calibrate_codecs())
+
+    @staticmethod
+    def select_codec(codec: str = None, profile: str = None) -> str:
+        """Resolves an explicit codec or a fastest/smallest/balanced profile to a codec name.
+
+        Profiles are scored on the cached calibration (see calibrate_codecs()).
+        """
+        if codec:
+            codec = codec.upper()
+            if codec not in LOSSLESS_CODECS:
+                raise ValueError(f"Unsupported codec '{codec}'. Choose from: {', '.join(LOSSLESS_CODECS)}")
+            return codec
+        if not profile:
+            return DEFAULT_CODEC
+        if profile not in CODEC_PROFILES:
+            raise ValueError(f"Unknown profile '{profile}'. Choose from: {', '.join(CODEC_PROFILES)}")
+
+        results = VideoSteganography.calibrate_codecs()
+        if not results:
+            raise ValueError("No lossless video codec is available in this OpenCV build")
+        fastest = min(r['seconds'] for r in results.values()) or 1e-9
+        smallest = min(r['bytes'] for r in results.values()) or 1
+
+        def score(name):
+            r = results[name]
+            if profile == 'fastest':
+                return r['seconds']
+            if profile == 'smallest':
+                return r['bytes']
+            return r['seconds'] / fastest + r['bytes'] / smallest
+
+        return min(results, key=score)
+
+    @staticmethod
+    def _read_bits(video_path: str, positions: np.ndarray) -> np.ndarray:
+        """Reads the LSBs at the given carrier positions, stopping after the last frame needed."""
+        order = np.argsort(positions, kind='stable')
+        sorted_positions = positions[order]
+        bits = np.empty(len(positions), dtype=np.uint8)
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError("Could not open video file")
+        try:
+            done, frame_start = 0, 0
+            while done < len(sorted_positions):
+                ret, frame = cap.read()
+                if not ret:
+                    raise ValueError("Video ended before the hidden message")
+                flat = frame.reshape(-1)
+                end = np.searchsorted(sorted_positions, frame_start + flat.size)
+                bits[order[done:end]] = flat[sorted_positions[done:end] - frame_start] & 1
+                done, frame_start = end, frame_start + flat.size
+        finally:
+            cap.release()
+        return bits
+
+    @staticmethod
+    def _plan_bits(video_path: str, bits: np.ndarray, capacity: int, scatter_key: str = None,
+                   matrix_k: int = None):
+        """Returns the carrier positions to write, sorted, and the LSB each one gets."""
+        needed = elements_for_bits(len(bits), matrix_k)
+        if needed > capacity:
+            raise ValueError(f"Message too large ({needed}/{capacity} bits)")
+
+        positions = carrier_positions(0, needed, capacity, scatter_key)
+        if matrix_k:
+            # Only the elements the syndrome code flips get written
+            cover = VideoSteganography._read_bits(video_path, positions)
+            flips = hamming_embed(cover, bits, matrix_k)
+            positions, bits = positions[flips], cover[flips] ^ 1
+
+        # Sort target positions so each frame takes one contiguous slice of them
+        order = np.argsort(positions, kind='stable')
+        return positions[order], bits[order]
+
+    @staticmethod
+    def _embed_frame(flat: np.ndarray, positions: np.ndarray, bits: np.ndarray, bit_idx: int,
+                     frame_start: int) -> int:
+        """Writes the planned bits that fall into one flattened frame; returns the next bit index."""
+        end = np.searchsorted(positions, frame_start + flat.size)
+        if end > bit_idx:
+            index = positions[bit_idx:end] - frame_start
+            flat[index] = (flat[index] & 0xFE) | bits[bit_idx:end]
+        return max(int(end), bit_idx)
+
+    @staticmethod
+    def _open_writer(path: str, codec: str, cap):
+        fourcc = cv2.VideoWriter_fourcc(*LOSSLESS_CODECS[codec])
+        out = cv2.VideoWriter(path, fourcc, cap.get(cv2.CAP_PROP_FPS),
+                              (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                               int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+                              isColor=True)
+        if not out.isOpened():
+            raise ValueError(f"Could not open video writer for codec {codec}")
+        return out
+
+    @staticmethod
+    def encode(video_path: str, message, output_path: str, key: str = None, append: bool = False,
+               codec: str = None, profile: str = None, scatter_key: str = None, matrix_k: int = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, ecc: int = None) -> None:
+        """Hides message in the frames' LSBs and writes a lossless .avi.
+
+        message may also be bytes, a binary file-like object or an iterable of
+        bytes; it is then framed as a binary container whose bits are generated
+        chunk by chunk as frames are written. A PreparedPayload is embedded as
+        already encrypted and framed; it cannot be appended to an existing message.
+        With ecc (Reed-Solomon parity bytes per 255-byte block) a str message is
+        framed as a container too, so damaged bits are repaired on decoding.
+        """
+        prepared = isinstance(message, PreparedPayload)
+        if prepared and ecc:
+            raise ValueError("A PreparedPayload has fixed framing; ecc cannot be added to it")
+        stream = bool(ecc) or (not prepared and is_stream_source(message))
+        if stream and (append or scatter_key or matrix_k):
+            raise ValueError("Streamed payloads only support the sequential layout without append")
+        if prepared and append:
+            raise ValueError("A PreparedPayload cannot be appended to an existing message")
         output_path = os.path.splitext(output_path)[0] + '.avi'
         temp_path = None
         temp_dir = os.path.dirname(output_path) or '.'
@@ -49,20 +330,31 @@ class VideoSteganography:
         out = None
 
         try:
+            codec = VideoSteganography.select_codec(codec, profile)
             existing_message = ""
             if append and os.path.exists(output_path):
                 try:
-                    existing_message = VideoSteganography.decode(output_path, key)
+                    existing_message = VideoSteganography.decode(output_path, key, scatter_key, matrix_k)
                 except Exception as e:
                     print(f"Warning: Could not read existing message - {str(e)}")
 
-            combined_message = f"{existing_message}\n{message}" if existing_message else message
+            if stream:
+                # Container bits are produced on demand; capacity is checked as frames run out
+                source, text = container_source(message)
+                feeder = BitFeeder(iter_container_bits(source, key, chunk_size, ecc, text))
+                full_msg = np.zeros(0, dtype=np.uint8)
+            elif prepared:
+                full_msg = prepared_bits(message, 'video', key)
+            else:
+                combined_message = f"{existing_message}\n{message}" if existing_message else message
 
-            if key:
-                combined_message = VideoSteganography.encrypt_message(key, combined_message)
+                if key:
+                    combined_message = VideoSteganography.encrypt_message(key, combined_message)
 
-            binary_msg = ''.join(f"{ord(c):08b}" for c in combined_message)
-            full_msg = f"{len(binary_msg):064b}" + binary_msg
+                # 64-bit big-endian length (in bits) followed by the message bits
+                message_bits = text_to_bits(combined_message)
+                header = np.frombuffer(struct.pack('>Q', len(message_bits)), dtype=np.uint8)
+                full_msg = np.concatenate([np.unpackbits(header), message_bits])
 
             input_source = output_path if append and os.path.exists(output_path) else video_path
             cap = cv2.VideoCapture(input_source)
@@ -70,36 +362,38 @@ class VideoSteganography:
                 raise ValueError(f"Could not open input video: {input_source}")
 
             capacity = VideoSteganography._get_video_capacity(cap)
-            if len(full_msg) > capacity:
-                cap.release()
-                raise ValueError(f"Message too large ({len(full_msg)}/{capacity} bits)")
+            positions, full_msg = VideoSteganography._plan_bits(input_source, full_msg, capacity,
+                                                                scatter_key, matrix_k)
 
             temp_fd, temp_path = tempfile.mkstemp(suffix='.avi', dir=temp_dir)
             os.close(temp_fd)
-            fourcc = cv2.VideoWriter_fourcc(*'FFV1')
-            out = cv2.VideoWriter(temp_path, fourcc, cap.get(cv2.CAP_PROP_FPS),
-                                  (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                                   int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
-                                  isColor=True)
+            out = VideoSteganography._open_writer(temp_path, codec, cap)
 
             bit_idx = 0
+            frame_start = 0
             while cap.isOpened():
                 ret, frame = cap.read()
                 if not ret:
                     break
 
-                if bit_idx < len(full_msg):
-                    for row in frame:
-                        for pixel in row:
-                            for channel in range(3):
-                                if bit_idx < len(full_msg):
-                                    pixel[channel] = (pixel[channel] & 0xFE) | int(full_msg[bit_idx])
-                                    bit_idx += 1
+                flat = frame.reshape(-1)
+                if stream:
+                    bits = feeder.take(flat.size)
+                    flat[:len(bits)] = (flat[:len(bits)] & 0xFE) | bits
+                    frame_start += flat.size
+                    out.write(frame)
+                    continue
+
+                bit_idx = VideoSteganography._embed_frame(flat, positions, full_msg, bit_idx, frame_start)
+                frame_start += flat.size
 
                 out.write(frame)
 
-            if bit_idx < len(full_msg):
+            if bit_idx < len(full_msg) or (stream and not feeder.exhausted):
                 raise ValueError("Insufficient video frames to store message")
+            if scatter_key and frame_start != capacity:
+                # The decoder derives the scatter layout from the output's frame count
+                raise ValueError("Input frame count is unreliable; cannot use scattering with this video")
 
             cap.release()
             out.release()
@@ -120,53 +414,284 @@ class VideoSteganography:
                 out.release()
 
     @staticmethod
-    def decode(video_path: str, key: str = None) -> str:
+    def _resume_job(video_path: str, codec: str, matrix_k: int, segment_frames: int) -> dict:
+        """Identifies a resumable job by its non-secret settings; a checkpoint is only reused when this matches."""
+        stat = os.stat(video_path)
+        return {
+            'source': os.path.abspath(video_path),
+            'source_size': stat.st_size,
+            'source_mtime': stat.st_mtime_ns,
+            'codec': codec,
+            'matrix_k': matrix_k,
+            'segment_frames': segment_frames,
+        }
+
+    @staticmethod
+    def _scatter_check(scatter_key: str, salt: bytes) -> str:
+        # Salted and slow, so the manifest is no faster an oracle for the scatter key than the video
+        return hashlib.pbkdf2_hmac('sha256', scatter_key.encode(), salt, SCATTER_CHECK_ROUNDS).hex()
+
+    @staticmethod
+    def _checkpoint_matches(manifest: dict, payload: bytes, message, key: str, scatter_key: str) -> bool:
+        """Whether a checkpoint was written for this message, key and scatter key.
+
+        Nothing derived from the key or message is stored in clear: the saved
+        ciphertext is decrypted and compared instead, as a decode would.
+        """
+        if manifest.get('payload') != hashlib.sha256(payload).hexdigest():
+            return False
+        scatter = manifest.get('scatter')
+        if bool(scatter) != bool(scatter_key) or (scatter and scatter['check'] != VideoSteganography._scatter_check(
+                scatter_key, bytes.fromhex(scatter['salt']))):
+            return False
+        if isinstance(message, PreparedPayload):
+            return payload == message.packed('length').tobytes()
+        if not key:
+            return payload == PreparedPayload(message, media=('video',)).packed('length').tobytes()
+        try:
+            return VideoSteganography.decrypt_message(key, payload[8:].decode('latin-1')) == message
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _save_manifest(path: str, manifest: dict) -> None:
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _load_manifest(path: str):
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+    @staticmethod
+    def _join_segments(segment_paths: list, output_path: str, codec: str, frame_count: int) -> None:
+        """Concatenates lossless segments into output_path without re-encoding when ffmpeg is available."""
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg:
+            list_path = output_path + '.txt'
+            with open(list_path, 'w') as f:
+                for path in segment_paths:
+                    escaped = os.path.abspath(path).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            try:
+                result = subprocess.run([ffmpeg, '-v', 'error', '-y', '-f', 'concat', '-safe', '0',
+                                         '-i', list_path, '-c', 'copy', output_path],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            finally:
+                os.remove(list_path)
+            if result.returncode == 0:
+                cap = cv2.VideoCapture(output_path)
+                copied = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                cap.release()
+                if copied == frame_count:
+                    return
+
+        # No (working) ffmpeg: re-mux frame by frame; the codec is lossless so LSBs survive
+        out = None
+        for path in segment_paths:
+            cap = cv2.VideoCapture(path)
+            try:
+                if out is None:
+                    out = VideoSteganography._open_writer(output_path, codec, cap)
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    out.write(frame)
+            finally:
+                cap.release()
+        if out is not None:
+            out.release()
+
+    @staticmethod
+    def encode_resumable(video_path: str, message, output_path: str, key: str = None, codec: str = None,
+                         profile: str = None, scatter_key: str = None, matrix_k: int = None,
+                         segment_frames: int = DEFAULT_SEGMENT_FRAMES, checkpoint_dir: str = None) -> None:
+        """Like encode(), but checkpoints progress so an interrupted run can be continued.
+
+        Frames are written in segments of segment_frames into checkpoint_dir
+        (default: output_path + '.parts') next to a manifest.json recording the
+        frames done, bits embedded and the codec. Calling this again with the
+        same arguments skips the finished segments; only the remaining frames are
+        embedded. The encrypted payload is stored with the checkpoint so a resumed
+        run embeds the same ciphertext. When all frames are done the segments are
+        joined and moved over output_path. message is a str or a PreparedPayload.
+        """
+        if not os.path.exists(video_path):
+            raise FileNotFoundError("Error: Input video file does not exist.")
+        prepared = isinstance(message, PreparedPayload)
+        if not prepared and is_stream_source(message):
+            raise ValueError("Resumable encoding needs a str message or a PreparedPayload")
+        if segment_frames < 1:
+            raise ValueError("segment_frames must be positive")
+        output_path = os.path.splitext(output_path)[0] + '.avi'
+        checkpoint_dir = checkpoint_dir or output_path + '.parts'
+        manifest_path = os.path.join(checkpoint_dir, 'manifest.json')
+        payload_path = os.path.join(checkpoint_dir, 'payload.bin')
+        codec = VideoSteganography.select_codec(codec, profile)
+
+        job = VideoSteganography._resume_job(video_path, codec, matrix_k, segment_frames)
+        manifest = VideoSteganography._load_manifest(manifest_path)
+        payload = None
+        if manifest and manifest['job'] == job and os.path.exists(payload_path):
+            with open(payload_path, 'rb') as f:
+                payload = f.read()
+            if not VideoSteganography._checkpoint_matches(manifest, payload, message, key, scatter_key):
+                payload = None
+        if payload is None:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            os.makedirs(checkpoint_dir)
+            if prepared:
+                payload = np.packbits(prepared_bits(message, 'video', key)).tobytes()
+            else:
+                payload = PreparedPayload(message, key, media=('video',)).packed('length').tobytes()
+            with open(payload_path, 'wb') as f:
+                f.write(payload)
+            scatter = None
+            if scatter_key:
+                salt = os.urandom(16)
+                scatter = {'salt': salt.hex(), 'check': VideoSteganography._scatter_check(scatter_key, salt)}
+            manifest = {'version': MANIFEST_VERSION, 'job': job, 'payload': hashlib.sha256(payload).hexdigest(),
+                        'scatter': scatter, 'frames_done': 0, 'bits_done': 0, 'segments': []}
+            VideoSteganography._save_manifest(manifest_path, manifest)
+        bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+
         cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError("Could not open video file")
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Could not open input video: {video_path}")
+            capacity = VideoSteganography._get_video_capacity(cap)
+            positions, bits = VideoSteganography._plan_bits(video_path, bits, capacity, scatter_key, matrix_k)
+            frame_size = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) * int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) * 3
 
-        bits = []
-        total_needed_bits = None
+            # Skip what earlier runs finished; grab() does not convert the frames
+            for _ in range(manifest['frames_done']):
+                if not cap.grab():
+                    raise ValueError("Input video is shorter than the checkpoint")
+            frame_start = manifest['frames_done'] * frame_size
+            bit_idx = int(np.searchsorted(positions, frame_start))
 
+            finished = False
+            while not finished:
+                segment = f"segment_{len(manifest['segments']):05d}.avi"
+                segment_path = os.path.join(checkpoint_dir, segment)
+                out = VideoSteganography._open_writer(segment_path, codec, cap)
+                written = 0
+                try:
+                    while written < segment_frames:
+                        ret, frame = cap.read()
+                        if not ret:
+                            finished = True
+                            break
+                        flat = frame.reshape(-1)
+                        bit_idx = VideoSteganography._embed_frame(flat, positions, bits, bit_idx, frame_start)
+                        frame_start += flat.size
+                        out.write(frame)
+                        written += 1
+                finally:
+                    out.release()
+
+                if not written:
+                    os.remove(segment_path)
+                    break
+                # A segment only counts once its file is closed and the manifest says so
+                manifest['segments'].append(segment)
+                manifest['frames_done'] += written
+                manifest['bits_done'] = bit_idx
+                VideoSteganography._save_manifest(manifest_path, manifest)
+        finally:
+            cap.release()
+
+        if bit_idx < len(positions):
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            raise ValueError("Insufficient video frames to store message")
+        if scatter_key and frame_start != capacity:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            raise ValueError("Input frame count is unreliable; cannot use scattering with this video")
+
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.avi', dir=os.path.dirname(output_path) or '.')
+        os.close(temp_fd)
         try:
-            while cap.isOpened():
+            segment_paths = [os.path.join(checkpoint_dir, segment) for segment in manifest['segments']]
+            VideoSteganography._join_segments(segment_paths, temp_path, codec, manifest['frames_done'])
+            os.replace(temp_path, output_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+    @staticmethod
+    def _decode_stream(video_path: str, sink, key: str) -> PayloadReader:
+        """Reads a binary container into sink frame by frame; returns the finished reader."""
+        reader = PayloadReader(sink, key)
+        cap = cv2.VideoCapture(video_path)
+        pending = np.zeros(0, dtype=np.uint8)
+        try:
+            while True:
                 ret, frame = cap.read()
                 if not ret:
-                    break
+                    raise ValueError("Video ended before the end of the payload")
+                lsbs = np.concatenate([pending, frame.reshape(-1) & 1])
+                whole = len(lsbs) - len(lsbs) % 8
+                pending = lsbs[whole:]
+                if reader.feed(np.packbits(lsbs[:whole]).tobytes()):
+                    return reader
+        finally:
+            cap.release()
 
-                for row in frame:
-                    for pixel in row:
-                        for channel in range(3):
-                            bits.append(str(pixel[channel] & 1))
+    @staticmethod
+    def decode(video_path: str, key: str = None, scatter_key: str = None, matrix_k: int = None, sink=None):
+        """Returns the hidden message as str, or as bytes for streamed payloads.
 
-                            if len(bits) == 64 and total_needed_bits is None:
-                                msg_length = int(''.join(bits), 2)
-                                total_needed_bits = 64 + msg_length
+        With a sink (a binary file-like object) the payload is written there
+        instead and the number of bytes written is returned.
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError("Could not open video file")
+        capacity = VideoSteganography._get_video_capacity(cap)
+        cap.release()
 
-                            if total_needed_bits and len(bits) >= total_needed_bits:
-                                cap.release()
-                                break
-                        if total_needed_bits and len(bits) >= total_needed_bits:
-                            break
-                    if total_needed_bits and len(bits) >= total_needed_bits:
-                        break
-                if total_needed_bits and len(bits) >= total_needed_bits:
-                    break
+        if capacity < elements_for_bits(64, matrix_k):
+            return ""
+
+        def read(bit_count):
+            count = elements_for_bits(bit_count, matrix_k)
+            lsbs = VideoSteganography._read_bits(video_path, carrier_positions(0, count, capacity, scatter_key))
+            return hamming_extract(lsbs, matrix_k) if matrix_k else lsbs
 
-            if len(bits) < 64:
-                return ""
+        try:
+            sequential = not scatter_key and not matrix_k
+            # Enough bits for a (possibly damaged) repeated ECC container header as well
+            probe = read(PROBE_BYTES * 8 if sequential and capacity >= PROBE_BYTES * 8 else 64)
+            header = probe[:64]
+            if sequential and has_container_magic(np.packbits(probe).tobytes()):
+                target = sink if sink is not None else io.BytesIO()
+                reader = VideoSteganography._decode_stream(video_path, target, key)
+                return reader.result(sink, target)
+
+            msg_length = int.from_bytes(np.packbits(header).tobytes(), 'big')
+            if elements_for_bits(64 + msg_length, matrix_k) > capacity:
+                raise ValueError("No hidden message found")
 
-            msg_length = int(''.join(bits[:64]), 2)
-            message_bits = bits[64:64 + msg_length]
-            message = ''.join([chr(int(''.join(message_bits[i:i + 8]), 2))
-                               for i in range(0, len(message_bits), 8)])
+            message_bits = read(64 + msg_length)[64:64 + msg_length]
+            message = np.packbits(message_bits[:msg_length - msg_length % 8]).tobytes().decode('latin-1')
 
             if key:
                 message = VideoSteganography.decrypt_message(key, message)
 
+            if sink is not None:
+                return write_text(sink, message)
             return message
 
         except Exception as e:
             raise ValueError(f"Decoding failed: {str(e)}")
-        finally:
-            cap.release()